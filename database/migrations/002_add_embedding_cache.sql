@@ -0,0 +1,50 @@
+-- ============================================================================
+-- Redirx Embedding Cache Migration
+-- Version: 1.0
+-- Description: Adds a content-addressed embedding cache shared across sessions
+-- ============================================================================
+-- IMPORTANT: Execute this in Supabase Dashboard → SQL Editor
+-- ============================================================================
+
+-- ============================================================================
+-- Step 1: Create embedding_cache table
+-- ============================================================================
+-- Keyed by a BLAKE2b-128 hex digest of the extracted page text plus the
+-- embedding model, so identical text is embedded once across all sessions.
+-- Only the hash and the vector are stored, never the text itself.
+
+CREATE TABLE IF NOT EXISTS public.embedding_cache (
+  content_hash TEXT NOT NULL,
+  model TEXT NOT NULL,
+  embedding vector(1536) NOT NULL,
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  PRIMARY KEY (content_hash, model)
+);
+
+-- ============================================================================
+-- Step 2: RLS Policies
+-- ============================================================================
+-- Entries are derived vectors keyed by an opaque hash, so any signed-in user
+-- may read them. Page text is public and its hash predictable, so writes are
+-- left to the service role (which bypasses RLS): a user able to insert could
+-- plant a wrong vector under another site's hash.
+
+ALTER TABLE embedding_cache ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Authenticated users can read cached embeddings"
+  ON embedding_cache FOR SELECT
+  TO authenticated
+  USING (true);
+
+-- ============================================================================
+-- Verification Queries (run these after migration to verify)
+-- ============================================================================
+
+-- Check table exists
+-- SELECT COUNT(*) FROM embedding_cache;
+
+-- ============================================================================
+-- Migration Complete!
+-- Set EMBEDDING_CACHE_ENABLED=false to skip the cache (e.g. before running
+-- this migration).
+-- ============================================================================
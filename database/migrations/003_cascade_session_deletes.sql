@@ -0,0 +1,72 @@
+-- ============================================================================
+-- Redirx Cascading Session Deletes Migration
+-- Version: 1.0
+-- Description: Deleting a session removes its embeddings and mappings
+-- ============================================================================
+-- IMPORTANT: Execute this in Supabase Dashboard → SQL Editor
+-- ============================================================================
+
+-- ============================================================================
+-- Step 1: Recreate session foreign keys with ON DELETE CASCADE
+-- ============================================================================
+-- A single DELETE on migration_sessions now removes the session's rows in
+-- webpage_embeddings and url_mappings inside the same transaction.
+--
+-- The existing constraints are found by what they reference rather than by
+-- name, since the base schema may not use the default *_session_id_fkey names.
+
+DO $$
+DECLARE
+  fk RECORD;
+BEGIN
+  FOR fk IN
+    SELECT c.conrelid::regclass AS table_name, c.conname
+    FROM pg_constraint c
+    JOIN pg_attribute a
+      ON a.attrelid = c.conrelid AND a.attnum = ANY (c.conkey)
+    WHERE c.contype = 'f'
+      AND c.confrelid = 'public.migration_sessions'::regclass
+      AND c.conrelid IN ('public.webpage_embeddings'::regclass, 'public.url_mappings'::regclass)
+      AND a.attname = 'session_id'
+  LOOP
+    EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', fk.table_name, fk.conname);
+  END LOOP;
+END $$;
+
+ALTER TABLE webpage_embeddings
+  ADD CONSTRAINT webpage_embeddings_session_id_fkey
+    FOREIGN KEY (session_id) REFERENCES migration_sessions(id) ON DELETE CASCADE;
+
+ALTER TABLE url_mappings
+  ADD CONSTRAINT url_mappings_session_id_fkey
+    FOREIGN KEY (session_id) REFERENCES migration_sessions(id) ON DELETE CASCADE;
+
+-- ============================================================================
+-- Step 2: Check that no non-cascading session foreign key is left
+-- ============================================================================
+
+DO $$
+BEGIN
+  IF EXISTS (
+    SELECT 1
+    FROM pg_constraint
+    WHERE contype = 'f'
+      AND confrelid = 'public.migration_sessions'::regclass
+      AND conrelid IN ('public.webpage_embeddings'::regclass, 'public.url_mappings'::regclass)
+      AND confdeltype <> 'c'
+  ) THEN
+    RAISE EXCEPTION 'A session foreign key still does not cascade on delete';
+  END IF;
+END $$;
+
+-- ============================================================================
+-- Verification Queries (run these after migration to verify)
+-- ============================================================================
+
+-- Check both constraints cascade (confdeltype = 'c')
+-- SELECT conrelid::regclass, conname, confdeltype FROM pg_constraint
+-- WHERE contype = 'f' AND confrelid = 'public.migration_sessions'::regclass;
+
+-- ============================================================================
+-- Migration Complete!
+-- ============================================================================
@@ -22,6 +22,16 @@ class Config:
     # Embedding Configuration
     EMBEDDING_MODEL: str = os.getenv('EMBEDDING_MODEL', 'text-embedding-3-small')
     EMBEDDING_DIMENSION: int = int(os.getenv('EMBEDDING_DIMENSION', '1536'))
+    # Texts sent per embeddings request (the API accepts up to 2048 inputs)
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv('EMBEDDING_BATCH_SIZE', '100'))
+    # Reuse embeddings across sessions via the embedding_cache table
+    EMBEDDING_CACHE_ENABLED: bool = os.getenv('EMBEDDING_CACHE_ENABLED', 'true').lower() == 'true'
+
+    # Near-duplicate HTML matching in HtmlPruneStage: minimum estimated Jaccard
+    # similarity for a 'near_html' mapping. Unset disables it (exact HTML only)
+    HTML_NEAR_DUP_THRESHOLD: Optional[float] = (
+        float(os.environ['HTML_NEAR_DUP_THRESHOLD']) if os.getenv('HTML_NEAR_DUP_THRESHOLD') else None
+    )
 
     # Matching Thresholds
     # HIGH = 0.9+, MEDIUM = 0.85-0.9, LOW = 0.7-0.85, < 0.7 = rejected (orphaned)
@@ -6,6 +6,24 @@ from uuid import UUID
 from .config import Config
 
 
+def _to_vector_literal(embedding) -> str:
+    """
+    Serialize an embedding as a pgvector text literal at float32 precision.
+
+    pgvector stores float32, so nine significant digits round-trip every
+    component exactly, at roughly 40% less payload than the float64 JSON
+    list that .tolist() produces.
+
+    Args:
+        embedding: Vector embedding array or list.
+
+    Returns:
+        str: Literal such as '[0.1,-0.25,...]'.
+    """
+    vector = np.asarray(embedding, dtype=np.float32)
+    return '[' + ','.join(['%.9g' % x for x in vector.tolist()]) + ']'
+
+
 class SupabaseClient:
     """
     Singleton wrapper for Supabase client.
@@ -97,12 +115,33 @@ class MigrationSessionDB:
 
         return result.data[0]
 
+    def delete_session(self, session_id: UUID) -> None:
+        """
+        Delete a session along with its embeddings and mappings.
+
+        Embeddings and mappings are removed by the ON DELETE CASCADE foreign
+        keys (migration 003_cascade_session_deletes.sql).
+
+        Args:
+            session_id: The session ID to delete.
+        """
+        self.client.table('migration_sessions').delete().eq(
+            'id', str(session_id)
+        ).execute()
+
 
 class WebPageEmbeddingDB:
     """
     Database operations for webpage embeddings.
     """
 
+    # Rows per select page; must not exceed the project's PostgREST max-rows,
+    # or a capped page would look like the last one
+    PAGE_SIZE = 1000
+    # Content hashes per cache lookup; each is a 32-character hex digest in
+    # the GET query string, so this keeps URLs well under common proxy limits
+    CACHE_LOOKUP_CHUNK = 100
+
     def __init__(self, client: Optional[Client] = None):
         self.client = client or SupabaseClient.get_client()
 
@@ -133,13 +172,48 @@ class WebPageEmbeddingDB:
             'session_id': str(session_id),
             'url': url,
             'site_type': site_type,
-            'embedding': embedding.tolist(),
+            'embedding': _to_vector_literal(embedding),
             'extracted_text': extracted_text,
             'title': title
         }).execute()
 
         return UUID(result.data[0]['id'])
 
+    def insert_embeddings(
+        self,
+        session_id: UUID,
+        site_type: str,
+        records: List[Dict[str, Any]]
+    ) -> List[UUID]:
+        """
+        Insert several webpage embeddings in a single request.
+
+        Args:
+            session_id: Migration session ID.
+            site_type: Either 'old' or 'new'.
+            records: Dicts with 'url', 'embedding', 'extracted_text' and
+                optionally 'title', as for insert_embedding().
+
+        Returns:
+            List[UUID]: The created embedding IDs, in record order.
+        """
+        if not records:
+            return []
+
+        result = self.client.table('webpage_embeddings').insert([
+            {
+                'session_id': str(session_id),
+                'url': record['url'],
+                'site_type': site_type,
+                'embedding': _to_vector_literal(record['embedding']),
+                'extracted_text': record['extracted_text'],
+                'title': record.get('title', '')
+            }
+            for record in records
+        ]).execute()
+
+        return [UUID(row['id']) for row in result.data]
+
     def find_similar_pages(
         self,
         query_embedding: np.ndarray,
@@ -162,7 +236,7 @@ class WebPageEmbeddingDB:
             List of dictionaries containing matching pages with similarity scores.
         """
         result = self.client.rpc('match_pages', {
-            'query_embedding': query_embedding.tolist(),
+            'query_embedding': _to_vector_literal(query_embedding),
             'target_site_type': site_type,
             'target_session_id': str(session_id),
             'match_count': match_count,
@@ -174,34 +248,116 @@ class WebPageEmbeddingDB:
     def get_embeddings_by_session(
         self,
         session_id: UUID,
-        site_type: Optional[str] = None
+        site_type: Optional[str] = None,
+        columns: str = '*'
     ) -> List[Dict[str, Any]]:
         """
         Get all embeddings for a session.
 
+        Rows are fetched PAGE_SIZE at a time, since PostgREST caps a single
+        select at its max-rows setting (1000 by default).
+
         Args:
             session_id: Migration session ID.
             site_type: Optional filter by site type.
+            columns: Columns to select, e.g. 'url, embedding' to skip the
+                extracted text when only the vectors are needed.
 
         Returns:
             List of embedding records with parsed embedding vectors.
         """
-        query = self.client.table('webpage_embeddings').select('*').eq(
-            'session_id', str(session_id)
-        )
+        records = []
+        start = 0
+        while True:
+            query = self.client.table('webpage_embeddings').select(columns).eq(
+                'session_id', str(session_id)
+            )
 
-        if site_type:
-            query = query.eq('site_type', site_type)
+            if site_type:
+                query = query.eq('site_type', site_type)
 
-        result = query.execute()
+            # A stable order keeps pages from overlapping or skipping rows
+            page = query.order('id').range(start, start + self.PAGE_SIZE - 1).execute().data
+            records.extend(page)
+
+            if len(page) < self.PAGE_SIZE:
+                break
+            start += self.PAGE_SIZE
 
         # Parse embedding vectors if they're returned as strings
         import json
-        for record in result.data:
+        for record in records:
             if 'embedding' in record and isinstance(record['embedding'], str):
                 record['embedding'] = json.loads(record['embedding'])
 
-        return result.data
+        return records
+
+    def get_by_content_hash(
+        self,
+        content_hashes: List[str],
+        model: str
+    ) -> Dict[str, np.ndarray]:
+        """
+        Look up cached embeddings by content hash.
+
+        Hashes are sent CACHE_LOOKUP_CHUNK per request and the results merged.
+
+        Args:
+            content_hashes: Hex digests of the extracted texts.
+            model: Embedding model the vectors must come from.
+
+        Returns:
+            Dictionary mapping each cached content hash to its float32 vector.
+            Hashes with no cached embedding are omitted.
+        """
+        if not content_hashes:
+            return {}
+
+        # Parse embedding vectors if they're returned as strings
+        import json
+        cached = {}
+        for start in range(0, len(content_hashes), self.CACHE_LOOKUP_CHUNK):
+            result = self.client.table('embedding_cache').select(
+                'content_hash, embedding'
+            ).eq('model', model).in_(
+                'content_hash', content_hashes[start:start + self.CACHE_LOOKUP_CHUNK]
+            ).execute()
+
+            for record in result.data:
+                embedding = record['embedding']
+                if isinstance(embedding, str):
+                    embedding = json.loads(embedding)
+                cached[record['content_hash']] = np.asarray(embedding, dtype=np.float32)
+
+        return cached
+
+    def put_by_content_hash(
+        self,
+        embeddings: Dict[str, np.ndarray],
+        model: str
+    ) -> None:
+        """
+        Store embeddings in the cross-session cache, keyed by content hash.
+
+        Entries already cached (e.g. written by a concurrent session) are left
+        as they are. Writes need the service role key; see
+        002_add_embedding_cache.sql.
+
+        Args:
+            embeddings: Dictionary mapping content hash to vector.
+            model: Embedding model that produced the vectors.
+        """
+        if not embeddings:
+            return
+
+        self.client.table('embedding_cache').upsert([
+            {
+                'content_hash': content_hash,
+                'model': model,
+                'embedding': _to_vector_literal(embedding)
+            }
+            for content_hash, embedding in embeddings.items()
+        ], on_conflict='content_hash,model', ignore_duplicates=True).execute()
 
 
 class URLMappingDB:
@@ -229,7 +385,7 @@ class URLMappingDB:
             old_url: Old site URL.
             new_url: New site URL.
             confidence_score: Similarity/confidence score.
-            match_type: Type of match ('exact_url', 'exact_html', 'semantic', 'manual').
+            match_type: Type of match ('exact_url', 'exact_html', 'near_html', 'semantic', 'manual').
             needs_review: Whether the mapping needs human review.
 
         Returns:
@@ -1,4 +1,5 @@
 from src.redirx import stages
+from src.redirx.config import Config
 from typing import Optional
 from uuid import UUID
 
@@ -39,7 +40,8 @@ class Pipeline:
         2. BlogPruneStage - Filter individual blog posts (keep landing pages)
         3. ExactUrlMatchStage - Match identical URL paths (before scraping)
         4. WebScraperStage - Scrape remaining HTML content
-        5. HtmlPruneStage - Match pages with identical HTML
+        5. HtmlPruneStage - Match pages with identical HTML (and near-identical
+           HTML when Config.HTML_NEAR_DUP_THRESHOLD is set)
         6. EmbedStage - Generate vector embeddings
         7. PairingStage - Semantic matching via vector similarity
 
@@ -54,7 +56,7 @@ class Pipeline:
             stages.BlogPruneStage(),
             stages.ExactUrlMatchStage(session_id=session_id),
             stages.WebScraperStage(),
-            stages.HtmlPruneStage(),
+            stages.HtmlPruneStage(near_dup_threshold=Config.HTML_NEAR_DUP_THRESHOLD),
             stages.EmbedStage(session_id=session_id),
             stages.PairingStage(session_id=session_id),
         ]
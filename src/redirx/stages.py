@@ -2,11 +2,19 @@ from __future__ import annotations
 
 import aiohttp
 import asyncio
-from bs4 import BeautifulSoup
-from typing import Optional
+import base64
+import functools
+import hashlib
+import httpx
+import random
+import threading
+import zlib
+import lxml.html
+from collections import OrderedDict
+from typing import ClassVar, Optional
 from uuid import UUID, uuid4
 import numpy as np
-from openai import AsyncOpenAI
+from openai import APIStatusError, AsyncOpenAI, DefaultAsyncHttpxClient, RateLimitError
 
 from .config import Config
 from .database import WebPageEmbeddingDB, MigrationSessionDB, URLMappingDB
@@ -28,23 +36,30 @@ class UrlPruneStage(Stage):
     """
 
     # File extensions that should be filtered out
-    BLOCKED_EXTENSIONS = {
+    BLOCKED_EXTENSIONS = frozenset({
         '.css', '.js', '.json', '.xml',  # Web assets
         '.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico', '.webp',  # Images
         '.woff', '.woff2', '.ttf', '.eot', '.otf',  # Fonts
         '.pdf', '.zip', '.tar', '.gz', '.rar',  # Documents/Archives
         '.mp4', '.mp3', '.avi', '.mov', '.wav',  # Media
         '.txt', '.csv', '.log',  # Data files
-    }
+    })
+
+    # Inputs with at least this many URLs in total are filtered in worker
+    # threads, so a large crawl doesn't block the event loop
+    THREAD_OFFLOAD_MIN_URLS = 1000
 
     def __init__(self):
         super().__init__()
 
     @staticmethod
+    @functools.lru_cache(maxsize=131072)
     def _sanitizer(url: str) -> bool:
         """
         Determine if a URL should be included in processing.
 
+        Memoized per URL, since crawls repeat the same asset URLs many times.
+
         Args:
             url: The URL to check
 
@@ -52,32 +67,27 @@ class UrlPruneStage(Stage):
             True if URL should be processed (is HTML or no extension)
             False if URL should be filtered out (is an asset file)
         """
-        # Extract path from URL (handle both full URLs and paths)
-        from urllib.parse import urlparse
-
         try:
-            parsed = urlparse(url)
-            path = parsed.path
-
-            # Get the file extension
-            if '.' in path:
-                # Get the last part after the last dot
-                extension = '.' + path.rsplit('.', 1)[-1].lower()
-
-                # Filter out if extension is in blocked list
-                if extension in UrlPruneStage.BLOCKED_EXTENSIONS:
-                    return False
-
-            # Allow HTML files explicitly
-            if path.endswith('.html') or path.endswith('.htm'):
-                return True
-
-            # Allow URLs without file extensions (likely pages)
-            if '.' not in path.split('/')[-1]:
+            # Path only, split off with str.partition rather than urlparse:
+            # fragment, then query, then scheme and host
+            path = url.partition('#')[0].partition('?')[0]
+            if path.startswith('//'):
+                path = path[2:].partition('/')[2]
+            else:
+                scheme, sep, rest = path.partition('://')
+                if sep and '/' not in scheme:
+                    path = rest.partition('/')[2]
+
+            # Extension of the last path segment only, so query strings and
+            # dotted directory names can't trigger a false match. As with
+            # splitext, leading dots (e.g. '/.htaccess') don't start one
+            dot = path.rfind('.')
+            slash = path.rfind('/')
+            if dot <= slash + 1 or not path[slash + 1:dot].lstrip('.'):
                 return True
 
-            # Allow other cases (e.g., .html, .php, etc.)
-            return True
+            # HTML, other page extensions, and extensionless paths are all allowed
+            return path[dot:].lower() not in UrlPruneStage.BLOCKED_EXTENSIONS
 
         except Exception:
             # If parsing fails, allow it (be permissive on errors)
@@ -95,11 +105,27 @@ class UrlPruneStage(Stage):
         """
         raw_old_urls, raw_new_urls = input
 
-        sanitized_old_urls = [url for url in raw_old_urls if UrlPruneStage._sanitizer(url)]
-        sanitized_new_urls = [url for url in raw_new_urls if UrlPruneStage._sanitizer(url)]
+        if len(raw_old_urls) + len(raw_new_urls) < self.THREAD_OFFLOAD_MIN_URLS:
+            return (self._filter_urls(raw_old_urls), self._filter_urls(raw_new_urls))
 
+        sanitized_old_urls, sanitized_new_urls = await asyncio.gather(
+            asyncio.to_thread(self._filter_urls, raw_old_urls),
+            asyncio.to_thread(self._filter_urls, raw_new_urls)
+        )
         return (sanitized_old_urls, sanitized_new_urls)
 
+    @staticmethod
+    def _filter_urls(urls: list[str]) -> list[str]:
+        """
+        Keep the URLs that pass _sanitizer, in first-seen order.
+
+        Repeated URLs are dropped, so each unique URL is checked (and later
+        scraped) once.
+        """
+        # Bound once rather than looked up on the class for every URL
+        sanitize = UrlPruneStage._sanitizer
+        return [url for url in dict.fromkeys(urls) if sanitize(url)]
+
 
 # =========================
 # Blog Prune Stage
@@ -134,11 +160,11 @@ class BlogPruneStage(Stage):
         - /blogs/index.html
         - /news/index.html
         """
-        from urllib.parse import urlparse
+        from urllib.parse import urlsplit
         import re
 
         try:
-            parsed = urlparse(url)
+            parsed = urlsplit(url)
             path = parsed.path.lower()
 
             # Keep landing pages explicitly
@@ -208,9 +234,9 @@ class ExactUrlMatchStage(Stage):
     @staticmethod
     def _get_path(url: str) -> str:
         """Extract and normalize path from URL (ignoring domain)."""
-        from urllib.parse import urlparse
+        from urllib.parse import urlsplit
         try:
-            parsed = urlparse(url)
+            parsed = urlsplit(url)
             path = parsed.path
 
             # Normalize root path variants: /, /index.html, /index.htm all become "/"
@@ -328,6 +354,10 @@ class WebScraperStage(Stage):
     Scrapes all URLs for their HTML content with comprehensive logging.
     """
 
+    # Open connections per host; kept alive and reused across the whole crawl
+    MAX_CONNECTIONS_PER_HOST = 16
+    KEEPALIVE_TIMEOUT = 30
+
     def __init__(self):
         super().__init__()
 
@@ -336,24 +366,18 @@ class WebScraperStage(Stage):
 
         print(f"\nWebScraperStage: Scraping {len(old_urls)} old + {len(new_urls)} new URLs...")
 
-        async with aiohttp.ClientSession() as session:
-
-            async def gather_old():
-                return await asyncio.gather(
-                    *[WebPage.scrape(session, url) for url in old_urls]
-                )
-
-            async def gather_new():
-                return await asyncio.gather(
-                    *[WebPage.scrape(session, url) for url in new_urls]
-                )
-
-            async with asyncio.TaskGroup() as group:
-                old_task = group.create_task(gather_old())
-                new_task = group.create_task(gather_new())
+        connector = aiohttp.TCPConnector(
+            limit_per_host=self.MAX_CONNECTIONS_PER_HOST,
+            keepalive_timeout=self.KEEPALIVE_TIMEOUT
+        )
+        async with aiohttp.ClientSession(connector=connector) as session:
+            # Fetch both sites in one gather; results come back in input order
+            webpages = await asyncio.gather(
+                *[WebPage.scrape(session, url) for url in old_urls + new_urls]
+            )
 
-            old_webpages = old_task.result()
-            new_webpages = new_task.result()
+        old_webpages = webpages[:len(old_urls)]
+        new_webpages = webpages[len(old_urls):]
 
         # Log scraping results
         old_success = sum(1 for p in old_webpages if len(p.html) > 0)
@@ -396,13 +420,38 @@ class HtmlPruneStage(Stage):
     """
     Matches pages with identical HTML content.
     Skips pages with empty or very short HTML to avoid false matches from scraping failures.
+
+    When near_dup_threshold is set, pages left unmatched by the exact pass are
+    also compared with MinHash + LSH, catching near-identical HTML (whitespace,
+    timestamps) before it reaches the embedding stage.
     """
 
     # Minimum HTML length to consider for matching (bytes)
     MIN_HTML_LENGTH = 100
 
-    def __init__(self):
+    # MinHash parameters: whitespace-token shingle width, signature length and
+    # LSH banding (LSH_BANDS * rows per band == MINHASH_PERMUTATIONS)
+    SHINGLE_SIZE = 5
+    MINHASH_PERMUTATIONS = 64
+    LSH_BANDS = 16
+    # Near matches at or above this estimated Jaccard skip review
+    NEAR_DUP_REVIEW_THRESHOLD = 0.99
+
+    _MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+    # Coefficients below 2**31 keep a * h + b (h < 2**32) within uint64
+    _rng = np.random.default_rng(1)
+    _PERM_A = _rng.integers(1, 1 << 31, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+    _PERM_B = _rng.integers(0, 1 << 31, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+    del _rng
+
+    def __init__(self, near_dup_threshold: Optional[float] = None):
+        """
+        Args:
+            near_dup_threshold: Minimum estimated Jaccard similarity for a
+                near-duplicate match. None disables near-duplicate matching.
+        """
         super().__init__()
+        self.near_dup_threshold = near_dup_threshold
 
     async def execute(
         self,
@@ -421,47 +470,166 @@ class HtmlPruneStage(Stage):
         if skipped_old > 0 or skipped_new > 0:
             print(f"⚠️  HtmlPruneStage: Skipped {skipped_old} old + {skipped_new} new pages with HTML < {self.MIN_HTML_LENGTH} bytes")
 
-        # Build hash map of valid new pages
-        new_page_map = {hash(page): page for page in valid_new_pages}
+        # Key pages by their HTML string directly, keeping the first page per HTML.
+        # str caches its own hash (already primed by WebPage.__init__), and a hit
+        # only costs one memcmp against the stored key.
+        new_page_map = {page.html: page for page in reversed(valid_new_pages)}
+        old_page_map = {page.html: page for page in reversed(valid_old_pages)}
 
-        # Check for hash collisions (suspicious if many pages have same hash)
+        # Duplicate keys mean some new pages share identical HTML
         if len(new_page_map) < len(valid_new_pages):
             collision_count = len(valid_new_pages) - len(new_page_map)
             print(f"⚠️  HtmlPruneStage: {collision_count} hash collisions detected - some new pages have identical HTML")
 
-        mappings = set()
-        matched_new_hashes = set()
-
-        for page in valid_old_pages:
-            page_hash = hash(page)
-            if page_hash in new_page_map and page_hash not in matched_new_hashes:
-                # Exact HTML match - highest confidence, no review needed
-                new_page = new_page_map[page_hash]
-                mappings.add(Mapping(
-                    old_page=page,
-                    new_page=new_page,
-                    confidence_score=1.0,
-                    match_type='exact_html',
-                    needs_review=False
-                ))
-                matched_new_hashes.add(page_hash)
-                print(f"✓ HtmlPruneStage: Exact HTML match - {page.url} → {new_page.url}")
+        # Exact HTML match - highest confidence, no review needed.
+        # A single get() per old page: the hit test and the lookup are one probe.
+        # Arguments are positional (old, new, score, type, review) since keyword
+        # calls roughly double Mapping construction cost in this loop.
+        mappings = {
+            Mapping(old_page, new_page, 1.0, 'exact_html', False)
+            for html, old_page in old_page_map.items()
+            if (new_page := new_page_map.get(html)) is not None
+        }
+
+        for mapping in mappings:
+            print(f"✓ HtmlPruneStage: Exact HTML match - {mapping.old_page.url} → {mapping.new_page.url}")
 
         print(f"HtmlPruneStage: Found {len(mappings)} exact HTML matches")
+
+        if self.near_dup_threshold is not None:
+            near_mappings = self._match_near_duplicates(
+                [p for p in valid_old_pages if p.html not in new_page_map],
+                [p for p in valid_new_pages if p.html not in old_page_map]
+            )
+            print(f"HtmlPruneStage: Found {len(near_mappings)} near-duplicate HTML matches")
+            mappings |= near_mappings
+
         return (old_pages, new_pages, mappings)
 
+    def _match_near_duplicates(
+        self,
+        old_pages: list[WebPage],
+        new_pages: list[WebPage]
+    ) -> set[Mapping]:
+        """
+        Pair near-identical pages using MinHash signatures bucketed by LSH bands.
+
+        Each new page is compared only with old pages sharing at least one band,
+        and takes the best unmatched candidate at or above near_dup_threshold.
+
+        Args:
+            old_pages: Old pages not matched by the exact pass.
+            new_pages: New pages not matched by the exact pass.
+
+        Returns:
+            Set of 'near_html' mappings scored by estimated Jaccard similarity.
+        """
+        if not old_pages or not new_pages:
+            return set()
+
+        rows = self.MINHASH_PERMUTATIONS // self.LSH_BANDS
+        old_signatures = [self._minhash_signature(p.html) for p in old_pages]
+
+        buckets: dict[tuple[int, bytes], list[int]] = {}
+        for index, signature in enumerate(old_signatures):
+            for band in range(self.LSH_BANDS):
+                key = (band, signature[band * rows:(band + 1) * rows].tobytes())
+                buckets.setdefault(key, []).append(index)
+
+        mappings = set()
+        matched_old = set()
+
+        for new_page in new_pages:
+            signature = self._minhash_signature(new_page.html)
+            candidates = {
+                index
+                for band in range(self.LSH_BANDS)
+                for index in buckets.get((band, signature[band * rows:(band + 1) * rows].tobytes()), ())
+                if index not in matched_old
+            }
+            if not candidates:
+                continue
+
+            best_index, best_jaccard = max(
+                ((index, float(np.mean(old_signatures[index] == signature))) for index in candidates),
+                key=lambda item: item[1]
+            )
+            if best_jaccard < self.near_dup_threshold:
+                continue
+
+            matched_old.add(best_index)
+            old_page = old_pages[best_index]
+            mappings.add(Mapping(
+                old_page=old_page,
+                new_page=new_page,
+                confidence_score=best_jaccard,
+                match_type='near_html',
+                needs_review=best_jaccard < self.NEAR_DUP_REVIEW_THRESHOLD
+            ))
+            print(f"≈ HtmlPruneStage: Near-duplicate HTML match ({best_jaccard:.2f}) - {old_page.url} → {new_page.url}")
+
+        return mappings
+
+    @classmethod
+    def _minhash_signature(cls, html: str) -> np.ndarray:
+        """
+        MinHash signature over whitespace-token shingles of the HTML.
+
+        Args:
+            html: Page HTML.
+
+        Returns:
+            uint64 array of MINHASH_PERMUTATIONS minimum permuted shingle hashes.
+        """
+        tokens = html.split()
+        width = min(cls.SHINGLE_SIZE, len(tokens)) or 1
+        shingles = {' '.join(tokens[i:i + width]) for i in range(max(len(tokens) - width + 1, 1))}
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode('utf-8')) for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+        permuted = (np.outer(hashes, cls._PERM_A) + cls._PERM_B) % cls._MERSENNE_PRIME
+        return permuted.min(axis=0)
+
 
 # =========================
 # Embedding Stage
 # =========================
 
 class EmbedStage(Stage):
+    # Upper bound on in-flight embedding requests (kept well below OpenAI's RPM limit)
+    MAX_CONCURRENT_REQUESTS = 32
+    # Texts sent per embeddings request
+    BATCH_SIZE = Config.EMBEDDING_BATCH_SIZE
+    # Estimated tokens sent per embeddings request, under the API's 300k
+    # per-request total with room for estimation error
+    MAX_BATCH_TOKENS = 250000
+    # Conservative characters-per-token ratio for the estimate (English
+    # averages about 4)
+    CHARS_PER_TOKEN = 3
+    # Batches' worth of pages extracted per step; the next step's extraction
+    # overlaps this step's embedding requests
+    EXTRACT_BATCHES = 4
+
+    # Embeddings by (BLAKE2b-128 of the text, model), shared by every EmbedStage
+    # in the process so re-running a migration doesn't re-embed unchanged pages.
+    # Least recently used entries are evicted beyond VECTOR_CACHE_SIZE.
+    VECTOR_CACHE_SIZE = 10000
+    _vector_cache: ClassVar[OrderedDict[tuple[bytes, str], np.ndarray]] = OrderedDict()
+    # Stages may run on separate event loops in separate threads
+    _vector_cache_lock: ClassVar[threading.Lock] = threading.Lock()
+
     def __init__(self, session_id: Optional[UUID] = None):
         super().__init__()
         self.session_id = session_id
         self.embedding_db = WebPageEmbeddingDB()
         self.session_db = MigrationSessionDB()
         self.openai_client: Optional[AsyncOpenAI] = None
+        # BLAKE2b-128(text) -> embedding future, so identical page text is only embedded once
+        self._embedding_cache: dict[bytes, asyncio.Future] = {}
+        # Shared by old- and new-site processing so the bound holds across both
+        self._request_semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
 
     async def execute(
         self,
@@ -490,7 +658,19 @@ class EmbedStage(Stage):
                 if len(page.html) < MIN_HTML_LENGTH:
                     print(f"   - {page.url}")
 
-        print(f"EmbedStage: Generating embeddings for {len(valid_old_pages)} old + {len(valid_new_pages)} new pages...")
+        # Pages already mapped by earlier stages are never paired again, so
+        # skip them before any text extraction or API call. Each site is checked
+        # against its own side only: a same-host migration can reuse a URL
+        matched_old_urls = {m.old_page.url for m in mappings}
+        matched_new_urls = {m.new_page.url for m in mappings}
+        old_to_embed = [p for p in valid_old_pages if p.url not in matched_old_urls]
+        new_to_embed = [p for p in valid_new_pages if p.url not in matched_new_urls]
+
+        already_matched = len(valid_old_pages) + len(valid_new_pages) - len(old_to_embed) - len(new_to_embed)
+        if already_matched:
+            print(f"EmbedStage: Skipping {already_matched} pages already matched by earlier stages")
+
+        print(f"EmbedStage: Generating embeddings for {len(old_to_embed)} old + {len(new_to_embed)} new pages...")
 
         # Validate OpenAI config
         Config.validate_embeddings()
@@ -499,69 +679,368 @@ class EmbedStage(Stage):
         if self.session_id is None:
             self.session_id = self.session_db.create_session(user_id="default")
 
-        # Create OpenAI client
-        self.openai_client = AsyncOpenAI(api_key=Config.OPENAI_API_KEY)
+        # One pooled client per run: its connections are reused by every
+        # request in the run, and closed with it
+        self.openai_client = AsyncOpenAI(
+            api_key=Config.OPENAI_API_KEY,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+            )
+        )
 
         try:
-            if valid_old_pages:
-                await self._process_pages(valid_old_pages, "old")
-            if valid_new_pages:
-                await self._process_pages(valid_new_pages, "new")
+            # Old and new sites share the request semaphore, so embedding them
+            # concurrently overlaps their requests without exceeding the bound
+            await asyncio.gather(*(
+                self._process_pages(pages, site_type)
+                for pages, site_type in ((old_to_embed, "old"), (new_to_embed, "new"))
+                if pages
+            ))
         finally:
             if self.openai_client:
                 await self.openai_client.close()
 
-        print(f"EmbedStage: Successfully generated {len(valid_old_pages) + len(valid_new_pages)} embeddings")
+        print(f"EmbedStage: Successfully generated {len(old_to_embed) + len(new_to_embed)} embeddings")
 
         return input
 
     async def _process_pages(self, pages: list[WebPage], site_type: str):
-        batch_size = 10
-        for i in range(0, len(pages), batch_size):
-            batch = pages[i:i+batch_size]
-            await asyncio.gather(
-                *[self._generate_and_store_embedding(page, site_type) for page in batch]
-            )
+        """
+        Embed pages in batched API calls, then store the embeddings with one
+        database insert per BATCH_SIZE pages. A page whose API batch or insert
+        fails is logged and skipped.
+        """
+        texts, embeddings = await self._extract_and_embed(pages)
 
-    async def _generate_and_store_embedding(self, page: WebPage, site_type: str):
-        try:
-            text = page.extract_text()
-            title = page.extract_title()
-            embedding = await self._generate_embedding_with_retry(text)
+        records = []
+        for page, text, embedding in zip(pages, texts, embeddings):
+            if isinstance(embedding, BaseException):
+                print(f"Error embedding {page.url}: {embedding}")
+                continue
 
-            self.embedding_db.insert_embedding(
-                session_id=self.session_id,
-                url=page.url,
-                site_type=site_type,
-                embedding=embedding,
-                extracted_text=text,
-                title=title
+            records.append({
+                'url': page.url,
+                'embedding': embedding,
+                'extracted_text': text,
+                'title': page.extract_title()
+            })
+
+        for start in range(0, len(records), self.BATCH_SIZE):
+            batch = records[start:start + self.BATCH_SIZE]
+            try:
+                self.embedding_db.insert_embeddings(
+                    session_id=self.session_id,
+                    site_type=site_type,
+                    records=batch
+                )
+            except Exception as e:
+                for record in batch:
+                    print(f"Error embedding {record['url']}: {e}")
+
+    async def _extract_and_embed(self, pages: list[WebPage]) -> tuple[list[str], list]:
+        """
+        Extract and embed pages in chunks of EXTRACT_BATCHES * BATCH_SIZE,
+        starting each chunk's requests as soon as its text is ready so the next
+        chunk is parsed while they are in flight. Length sorting happens within
+        a chunk.
+
+        Returns:
+            (texts, embeddings), one entry per page in order, as from
+            _prepare_texts() and _embed_texts().
+        """
+        chunk_size = self.BATCH_SIZE * self.EXTRACT_BATCHES
+        texts = []
+        pending = []
+
+        for start in range(0, len(pages), chunk_size):
+            chunk_texts = await self._prepare_texts(pages[start:start + chunk_size])
+            texts.extend(chunk_texts)
+            pending.append(asyncio.create_task(self._embed_texts(chunk_texts)))
+
+        embeddings = [
+            embedding
+            for chunk_embeddings in await asyncio.gather(*pending)
+            for embedding in chunk_embeddings
+        ]
+        return texts, embeddings
+
+    @staticmethod
+    async def _prepare_texts(pages: list[WebPage]) -> list[str]:
+        """
+        Extract every page's text and title up front, off the event loop.
+
+        HTML parsing runs in worker threads so it never stalls in-flight
+        embedding requests; both results are memoized on the pages.
+
+        Returns:
+            Extracted text per page, in order.
+        """
+        def extract(page: WebPage) -> str:
+            page.extract_title()
+            return page.extract_text()
+
+        return list(await asyncio.gather(*(asyncio.to_thread(extract, page) for page in pages)))
+
+    async def _embed_texts(self, texts: list[str]) -> list:
+        """
+        Embed texts with one API call per BATCH_SIZE distinct uncached texts
+        (fewer when they would exceed MAX_BATCH_TOKENS), keeping at most
+        MAX_CONCURRENT_REQUESTS calls in flight. A batch the API rejects with
+        a 4xx is split in half and retried, isolating the bad input.
+
+        Identical texts (within this call, across calls, or already in flight)
+        share a single embedding, keyed by a BLAKE2b-128 digest of the text.
+        When Config.EMBEDDING_CACHE_ENABLED is set, texts embedded earlier in
+        this process or by earlier sessions are read from the in-memory LRU or
+        the database cache instead of the API. Database cache reads and the
+        single write-back of this call's fresh embeddings run in worker
+        threads, so they never stall requests in flight.
+
+        Returns:
+            One entry per text, in order: its embedding, or the exception that
+            prevented it from being generated.
+        """
+        loop = asyncio.get_running_loop()
+        futures = []
+        to_fetch = []
+
+        for text in texts:
+            key = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+            future = self._embedding_cache.get(key)
+            if future is None:
+                future = loop.create_future()
+                self._embedding_cache[key] = future
+                to_fetch.append((key, text, future))
+            futures.append(future)
+
+        if Config.EMBEDDING_CACHE_ENABLED:
+            to_fetch = self._resolve_from_vector_cache(to_fetch)
+            to_fetch = await self._resolve_from_persistent_cache(to_fetch)
+
+        # Batch similar-length texts together so each request packs evenly;
+        # results still land in input order through the futures
+        to_fetch.sort(key=lambda entry: len(entry[1]))
+
+        # Fresh embeddings by hex digest, written to the database cache at once
+        to_cache = {}
+
+        async def embed_batch(batch):
+            try:
+                async with self._request_semaphore:
+                    vectors = await self._generate_embeddings_batch([text for _, text, _ in batch])
+            except Exception as e:
+                if len(batch) > 1 and self._is_client_error(e):
+                    # One rejected input fails the whole request; split the
+                    # batch so only that input's page is lost
+                    middle = len(batch) // 2
+                    await asyncio.gather(embed_batch(batch[:middle]), embed_batch(batch[middle:]))
+                    return
+                for key, _, future in batch:
+                    # Don't cache failures; a later request for this text retries
+                    del self._embedding_cache[key]
+                    future.set_exception(e)
+                return
+
+            for (_, _, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+            if Config.EMBEDDING_CACHE_ENABLED:
+                self._store_in_vector_cache(
+                    (key, vector) for (key, _, _), vector in zip(batch, vectors)
+                )
+                to_cache.update(
+                    (key.hex(), vector) for (key, _, _), vector in zip(batch, vectors)
+                )
+
+        await asyncio.gather(*(embed_batch(batch) for batch in self._request_batches(to_fetch)))
+
+        if to_cache:
+            try:
+                await asyncio.to_thread(
+                    self.embedding_db.put_by_content_hash, to_cache, Config.EMBEDDING_MODEL
+                )
+            except Exception as e:
+                print(f"Warning: Could not write embedding cache: {e}")
+
+        return await asyncio.gather(*futures, return_exceptions=True)
+
+    def _request_batches(self, to_fetch: list[tuple]) -> list[list[tuple]]:
+        """
+        Split (key, text, future) entries into consecutive request batches of
+        at most BATCH_SIZE texts and MAX_BATCH_TOKENS estimated tokens.
+
+        A single text over the token budget still gets a batch of its own.
+        """
+        batches = []
+        batch = []
+        batch_tokens = 0
+        for entry in to_fetch:
+            tokens = len(entry[1]) // self.CHARS_PER_TOKEN + 1
+            if batch and (len(batch) == self.BATCH_SIZE or batch_tokens + tokens > self.MAX_BATCH_TOKENS):
+                batches.append(batch)
+                batch = []
+                batch_tokens = 0
+            batch.append(entry)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _resolve_from_vector_cache(self, to_fetch: list[tuple]) -> list[tuple]:
+        """
+        Resolve pending embedding futures from the in-process LRU cache.
+
+        Args:
+            to_fetch: (key, text, future) entries not yet embedded in this stage.
+
+        Returns:
+            The entries that still need the database cache or an API call.
+        """
+        cache = EmbedStage._vector_cache
+        remaining = []
+        with EmbedStage._vector_cache_lock:
+            for entry in to_fetch:
+                cache_key = (entry[0], Config.EMBEDDING_MODEL)
+                vector = cache.get(cache_key)
+                if vector is None:
+                    remaining.append(entry)
+                else:
+                    cache.move_to_end(cache_key)
+                    entry[2].set_result(vector)
+        return remaining
+
+    def _store_in_vector_cache(self, items) -> None:
+        """
+        Add (key, embedding) pairs to the in-process LRU cache.
+        """
+        cache = EmbedStage._vector_cache
+        with EmbedStage._vector_cache_lock:
+            for key, vector in items:
+                cache[(key, Config.EMBEDDING_MODEL)] = vector
+                cache.move_to_end((key, Config.EMBEDDING_MODEL))
+            while len(cache) > self.VECTOR_CACHE_SIZE:
+                cache.popitem(last=False)
+
+    async def _resolve_from_persistent_cache(self, to_fetch: list[tuple]) -> list[tuple]:
+        """
+        Resolve pending embedding futures from the cross-session database cache.
+
+        The lookup runs in a worker thread. A failed lookup is logged and
+        treated as a full miss.
+
+        Args:
+            to_fetch: (key, text, future) entries not yet embedded in this stage.
+
+        Returns:
+            The entries that still need an API call.
+        """
+        if not to_fetch:
+            return to_fetch
+
+        try:
+            cached = await asyncio.to_thread(
+                self.embedding_db.get_by_content_hash,
+                [key.hex() for key, _, _ in to_fetch],
+                Config.EMBEDDING_MODEL
             )
         except Exception as e:
-            print(f"Error embedding {page.url}: {e}")
+            print(f"Warning: Could not read embedding cache: {e}")
+            return to_fetch
+
+        remaining = []
+        hits = []
+        for entry in to_fetch:
+            vector = cached.get(entry[0].hex())
+            if vector is None:
+                remaining.append(entry)
+            else:
+                entry[2].set_result(vector)
+                hits.append((entry[0], vector))
+        self._store_in_vector_cache(hits)
+
+        if cached:
+            print(f"EmbedStage: Reused {len(to_fetch) - len(remaining)} cached embeddings")
+        return remaining
 
     async def _generate_embedding_with_retry(self, text: str, max_retries=3):
+        embeddings = await self._generate_embeddings_batch([text], max_retries=max_retries)
+        return embeddings[0]
+
+    async def _generate_embeddings_batch(self, texts: list[str], max_retries=3) -> np.ndarray:
+        """
+        Embed several texts in one API request, retrying the whole batch on
+        failure. Client errors (4xx other than rate limits) are raised at once.
+
+        Returns:
+            (len(texts), dim) float32 array, rows in input order.
+        """
         for attempt in range(max_retries):
             try:
+                # base64 is the raw little-endian float32 buffer: decoding it is a
+                # memcpy, where "float" parses a JSON list of boxed floats per vector
                 resp = await self.openai_client.embeddings.create(
-                    input=text,
+                    input=texts,
                     model=Config.EMBEDDING_MODEL,
-                    encoding_format="float"
+                    encoding_format="base64"
                 )
-                return np.array(resp.data[0].embedding, dtype=np.float32)
+                if len(resp.data) != len(texts):
+                    raise ValueError(
+                        f"Expected {len(texts)} embeddings, got {len(resp.data)}"
+                    )
+                return np.stack([
+                    np.frombuffer(base64.b64decode(item.embedding), dtype=np.float32)
+                    for item in resp.data
+                ])
 
             except Exception as e:
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(2 ** attempt)
+                if attempt < max_retries - 1 and not self._is_client_error(e):
+                    await asyncio.sleep(self._retry_delay(e, attempt))
                 else:
                     raise
 
+    @staticmethod
+    def _is_client_error(error: Exception) -> bool:
+        """
+        Whether the API rejected the request itself (a 4xx other than a rate
+        limit), so sending the same input again can't succeed.
+        """
+        return (
+            isinstance(error, APIStatusError)
+            and 400 <= error.status_code < 500
+            and not isinstance(error, RateLimitError)
+        )
+
+    @staticmethod
+    def _retry_delay(error: Exception, attempt: int) -> float:
+        """
+        Seconds to wait before retrying a failed embeddings request.
+
+        Rate-limit errors honor the server's Retry-After header. Anything else
+        backs off exponentially (capped at 30s) with jitter, so concurrent
+        batches failing together don't all retry in lockstep.
+
+        Args:
+            error: The exception raised by the failed attempt.
+            attempt: Zero-based index of the failed attempt.
+        """
+        if isinstance(error, RateLimitError):
+            try:
+                return float(error.response.headers['retry-after'])
+            except (KeyError, ValueError):
+                pass
+        return min(0.5 * 2 ** attempt, 30) + random.uniform(0, 0.25)
+
 class PairingStage(Stage):
     """
     Pairs old and new webpages using vector similarity search.
     Generates redirect mappings with confidence scores and review flags.
     """
 
+    # Candidates considered per old page, best first
+    MATCH_COUNT = 5
+    # Old pages scored per matmul, bounding the similarity block held in memory
+    SCORE_BLOCK_ROWS = 1024
+
     def __init__(self, session_id: Optional[UUID] = None):
         """
         Initialize the PairingStage.
@@ -598,6 +1077,8 @@ class PairingStage(Stage):
         # Track which pages have been matched
         matched_old_pages = set()
         matched_new_pages = set()
+        # URL index of matched new pages for O(1) candidate filtering
+        matched_new_urls = set()
         all_mappings = set(existing_mappings)
 
         # First, process existing mappings from HtmlPruneStage (exact HTML matches)
@@ -614,6 +1095,7 @@ class PairingStage(Stage):
             )
             matched_old_pages.add(mapping.old_page)
             matched_new_pages.add(mapping.new_page)
+            matched_new_urls.add(mapping.new_page.url)
 
         # Find remaining unmatched pages
         unmatched_old_pages = [p for p in old_pages if p not in matched_old_pages]
@@ -621,9 +1103,9 @@ class PairingStage(Stage):
 
         # Filter out root paths - homepage doesn't need redirect
         def is_root_path(url: str) -> bool:
-            from urllib.parse import urlparse
+            from urllib.parse import urlsplit
             try:
-                path = urlparse(url).path
+                path = urlsplit(url).path
                 return path in ['/', '/index.html', '/index.htm']
             except:
                 return False
@@ -638,43 +1120,43 @@ class PairingStage(Stage):
 
         print(f"Finding semantic matches for {len(unmatched_old_pages)} unmatched old pages...")
 
-        # Process each unmatched old page
-        for old_page in unmatched_old_pages:
-            # Get embedding for this old page
-            old_embeddings = self.embedding_db.get_embeddings_by_session(
-                session_id=self.session_id,
-                site_type='old'
-            )
+        # Load each site's embeddings once and score every old/new pair in a
+        # single matmul, instead of a database round trip per old page
+        if unmatched_old_pages:
+            old_urls, old_matrix = self._load_embedding_matrix('old')
+            new_urls, new_matrix = self._load_embedding_matrix('new')
+        else:
+            old_urls, old_matrix = new_urls, new_matrix = [], np.empty((0, Config.EMBEDDING_DIMENSION), dtype=np.float32)
+        old_rows = {url: row for row, url in enumerate(old_urls)}
+        top_candidates, top_scores = self._top_matches(old_matrix, new_matrix, self.MATCH_COUNT)
+        new_url_array = np.array(new_urls, dtype=object)
+        unmatched_new_by_url = {p.url: p for p in unmatched_new_pages}
 
-            # Find the embedding for this specific old page
-            old_embedding_record = next(
-                (e for e in old_embeddings if e['url'] == old_page.url),
-                None
-            )
+        # (old_page, new_page, similarity, gap to runner-up) awaiting classification
+        pending_matches = []
 
-            if not old_embedding_record:
+        # Process each unmatched old page
+        for old_page in unmatched_old_pages:
+            row = old_rows.get(old_page.url)
+            if row is None:
                 print(f"Warning: No embedding found for {old_page.url}")
                 continue
 
-            old_embedding = np.array(old_embedding_record['embedding'], dtype=np.float32)
-
-            # Find similar pages in new site (excluding already matched pages)
-            similar_pages = self.embedding_db.find_similar_pages(
-                query_embedding=old_embedding,
-                session_id=self.session_id,
-                site_type='new',
-                match_count=5,  # Get top 5 candidates
-                match_threshold=0.0  # We'll filter by threshold ourselves
-            )
-
-            # Filter out already matched pages and root paths
-            similar_pages = [
-                p for p in similar_pages
-                if not any(p['url'] == matched.url for matched in matched_new_pages)
-                and not is_root_path(p['url'])  # Don't redirect TO root/homepage
+            # Best candidates on the new site, minus already matched pages
+            # and root paths (don't redirect TO root/homepage)
+            keep = [
+                i for i, col in enumerate(top_candidates[row])
+                if top_scores[row, i] >= 0.0
+                and new_urls[col] not in matched_new_urls
+                and not is_root_path(new_urls[col])
             ]
+            # Scores are rounded so float32 noise can't flip a threshold check
+            similar_pages = {
+                'urls': new_url_array[top_candidates[row, keep]],
+                'scores': np.round(top_scores[row, keep].astype(np.float64), 5)
+            }
 
-            if not similar_pages:
+            if not similar_pages['scores'].size:
                 print(f"No unmatched similar pages found for {old_page.url} (orphaned)")
                 continue
 
@@ -683,38 +1165,54 @@ class PairingStage(Stage):
 
             if best_match:
                 # Find the corresponding WebPage object
-                new_page = next(
-                    (p for p in unmatched_new_pages if p.url == best_match['url']),
-                    None
-                )
+                new_page = unmatched_new_by_url.get(best_match['url'])
 
                 if new_page:
-                    # Create mapping with confidence scoring
-                    mapping = self._create_mapping(
-                        old_page=old_page,
-                        new_page=new_page,
-                        similarity_score=best_match['similarity'],
-                        similar_pages=similar_pages
-                    )
-
-                    # Store in database
-                    self.mapping_db.insert_mapping(
-                        session_id=self.session_id,
-                        old_url=mapping.old_page.url,
-                        new_url=mapping.new_page.url,
-                        confidence_score=mapping.confidence_score,
-                        match_type=mapping.match_type,
-                        needs_review=mapping.needs_review
-                    )
-
-                    # Track this mapping
-                    all_mappings.add(mapping)
+                    # Claim the pair now so later old pages can't take it;
+                    # confidence scoring happens in one pass below
+                    pending_matches.append((
+                        old_page,
+                        new_page,
+                        best_match['similarity'],
+                        self._score_gap(best_match['similarity'], similar_pages)
+                    ))
                     matched_old_pages.add(old_page)
                     matched_new_pages.add(new_page)
+                    matched_new_urls.add(new_page.url)
+
+        # Classify all semantic matches at once
+        if pending_matches:
+            scores = np.array([m[2] for m in pending_matches], dtype=np.float64)
+            gaps = np.array([m[3] for m in pending_matches], dtype=np.float64)
+            match_types, review_flags = self._classify_matches(scores, gaps)
+
+            for (old_page, new_page, score, _), match_type, needs_review in zip(
+                pending_matches, match_types, review_flags
+            ):
+                mapping = Mapping(
+                    old_page=old_page,
+                    new_page=new_page,
+                    confidence_score=score,
+                    match_type=str(match_type),
+                    needs_review=bool(needs_review)
+                )
 
-                    review_flag = " [NEEDS REVIEW]" if mapping.needs_review else ""
-                    print(f"Matched: {old_page.url} -> {new_page.url} "
-                          f"(score: {mapping.confidence_score:.3f}, type: {mapping.match_type}){review_flag}")
+                # Store in database
+                self.mapping_db.insert_mapping(
+                    session_id=self.session_id,
+                    old_url=mapping.old_page.url,
+                    new_url=mapping.new_page.url,
+                    confidence_score=mapping.confidence_score,
+                    match_type=mapping.match_type,
+                    needs_review=mapping.needs_review
+                )
+
+                # Track this mapping
+                all_mappings.add(mapping)
+
+                review_flag = " [NEEDS REVIEW]" if mapping.needs_review else ""
+                print(f"Matched: {old_page.url} -> {new_page.url} "
+                      f"(score: {mapping.confidence_score:.3f}, type: {mapping.match_type}){review_flag}")
 
         # Identify orphaned pages (old pages with no match, excluding root paths)
         final_orphaned = [p for p in old_pages if p not in matched_old_pages and not is_root_path(p.url)]
@@ -741,35 +1239,112 @@ class PairingStage(Stage):
         # Return input unchanged (mappings stored in database)
         return (old_pages, new_pages, all_mappings)
 
-    def _find_best_match(self, similar_pages: list[dict]) -> Optional[dict]:
+    def _load_embedding_matrix(self, site_type: str) -> tuple[list[str], np.ndarray]:
         """
-        Find the best match from a list of similar pages.
+        Load one site's embeddings as an L2-normalized float32 matrix, so a
+        dot product between rows is their cosine similarity.
+
+        Args:
+            site_type: Either 'old' or 'new'.
+
+        Returns:
+            (urls, matrix) with matrix row i belonging to urls[i].
+        """
+        # Only the vectors are needed; skipping the extracted text keeps the
+        # transfer to roughly the size of the embeddings themselves
+        records = self.embedding_db.get_embeddings_by_session(
+            session_id=self.session_id,
+            site_type=site_type,
+            columns='url, embedding'
+        )
+        if not records:
+            return [], np.empty((0, Config.EMBEDDING_DIMENSION), dtype=np.float32)
+
+        matrix = np.asarray([r['embedding'] for r in records], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.maximum(norms, np.finfo(np.float32).tiny)
+        return [r['url'] for r in records], matrix
+
+    @classmethod
+    def _top_matches(
+        cls,
+        old_matrix: np.ndarray,
+        new_matrix: np.ndarray,
+        k: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Top k new-site rows for every old-site row by dot product.
+
+        Old rows are scored SCORE_BLOCK_ROWS at a time, so memory stays at
+        one block of similarities rather than the full old x new matrix.
+
+        Args:
+            old_matrix: (n_old, dim) normalized embeddings.
+            new_matrix: (n_new, dim) normalized embeddings.
+            k: Candidates per old row.
+
+        Returns:
+            (columns, scores), both (n_old, min(k, n_new)) and best first.
+        """
+        k = min(k, new_matrix.shape[0])
+        columns = np.empty((old_matrix.shape[0], k), dtype=np.intp)
+        scores = np.empty((old_matrix.shape[0], k), dtype=np.float32)
+
+        for start in range(0, old_matrix.shape[0], cls.SCORE_BLOCK_ROWS):
+            block = old_matrix[start:start + cls.SCORE_BLOCK_ROWS] @ new_matrix.T
+            top = cls._top_k(block, k)
+            columns[start:start + len(block)] = top
+            scores[start:start + len(block)] = np.take_along_axis(block, top, axis=1)
+
+        return columns, scores
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """
+        Column indices of the k highest scores in each row, best first.
+
+        Args:
+            scores: (rows, cols) score matrix.
+            k: Candidates per row; fewer are returned if there are fewer columns.
+
+        Returns:
+            (rows, min(k, cols)) integer array.
+        """
+        k = min(k, scores.shape[1])
+        if k == 0:
+            return np.empty((scores.shape[0], 0), dtype=np.intp)
+
+        top = np.argpartition(scores, -k, axis=1)[:, -k:]
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind='stable')
+        return np.take_along_axis(top, order, axis=1)
+
+    def _find_best_match(self, similar_pages: dict) -> Optional[dict]:
+        """
+        Find the best match among candidate pages.
         Returns None if no page meets the minimum threshold.
 
         Args:
-            similar_pages: List of similar pages with similarity scores.
+            similar_pages: Candidates as parallel 'urls' and 'scores' arrays.
 
         Returns:
-            Best matching page or None.
+            Best matching page as {'url', 'similarity'}, or None.
         """
-        if not similar_pages:
+        scores = similar_pages['scores']
+        if not scores.size:
             return None
 
-        # Filter by minimum threshold (0.6)
-        valid_matches = [p for p in similar_pages if p['similarity'] >= Config.MEDIUM_CONFIDENCE_THRESHOLD]
-
-        if not valid_matches:
+        best = int(scores.argmax())
+        if scores[best] < Config.MEDIUM_CONFIDENCE_THRESHOLD:
             return None
 
-        # Return the highest scoring match
-        return max(valid_matches, key=lambda p: p['similarity'])
+        return {'url': similar_pages['urls'][best], 'similarity': float(scores[best])}
 
     def _create_mapping(
         self,
         old_page: WebPage,
         new_page: WebPage,
         similarity_score: float,
-        similar_pages: list[dict]
+        similar_pages: dict
     ) -> Mapping:
         """
         Create a Mapping with appropriate confidence scoring and review flags.
@@ -778,60 +1353,90 @@ class PairingStage(Stage):
             old_page: Old site page.
             new_page: New site page.
             similarity_score: Similarity score for this match.
-            similar_pages: All similar pages (for ambiguity detection).
+            similar_pages: All candidates as 'urls' and 'scores' arrays (for
+                ambiguity detection).
 
         Returns:
             Mapping object with confidence score and metadata.
         """
-        # Determine match type based on similarity score
-        if similarity_score >= 0.9:
-            match_type = 'semantic_high'
-            needs_review = False
-        elif similarity_score >= Config.HIGH_CONFIDENCE_THRESHOLD:
-            match_type = 'semantic_medium'
-            # Check for ambiguity
-            needs_review = self._is_ambiguous(similarity_score, similar_pages)
-        elif similarity_score >= Config.MEDIUM_CONFIDENCE_THRESHOLD:
-            match_type = 'semantic_low'
-            needs_review = True  # Always review low confidence matches
-        else:
-            # This shouldn't happen if _find_best_match works correctly
-            match_type = 'semantic_very_low'
-            needs_review = True
+        gap = self._score_gap(similarity_score, similar_pages)
+        match_types, review_flags = self._classify_matches(
+            np.array([similarity_score]), np.array([gap])
+        )
 
         return Mapping(
             old_page=old_page,
             new_page=new_page,
             confidence_score=similarity_score,
-            match_type=match_type,
-            needs_review=needs_review
+            match_type=str(match_types[0]),
+            needs_review=bool(review_flags[0])
         )
 
-    def _is_ambiguous(self, top_score: float, similar_pages: list[dict]) -> bool:
+    def _classify_matches(
+        self,
+        scores: np.ndarray,
+        gaps: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
         """
-        Check if the match is ambiguous (top 2 scores are very close).
+        Assign match types and review flags to a batch of similarity scores.
+
+        Args:
+            scores: Similarity score of each match.
+            gaps: Gap between each score and its runner-up candidate.
+
+        Returns:
+            Tuple of (match_types, needs_review) arrays aligned with scores.
+        """
+        tiers = [
+            scores >= 0.9,
+            scores >= Config.HIGH_CONFIDENCE_THRESHOLD,
+            scores >= Config.MEDIUM_CONFIDENCE_THRESHOLD,
+        ]
+        # Anything below the medium threshold shouldn't reach here if
+        # _find_best_match works correctly
+        match_types = np.select(
+            tiers,
+            ['semantic_high', 'semantic_medium', 'semantic_low'],
+            default='semantic_very_low'
+        )
+        # Medium matches need review only when ambiguous; low ones always do
+        needs_review = np.select(
+            tiers,
+            [False, gaps < Config.AMBIGUITY_GAP_THRESHOLD, True],
+            default=True
+        )
+        return match_types, needs_review
+
+    def _score_gap(self, top_score: float, similar_pages: dict) -> float:
+        """
+        Gap between the top score and the second-best candidate.
 
         Args:
             top_score: The highest similarity score.
-            similar_pages: All similar pages with scores.
+            similar_pages: All candidates as 'urls' and 'scores' arrays.
 
         Returns:
-            True if ambiguous (needs review).
+            The gap, or infinity if there is no runner-up.
         """
-        if len(similar_pages) < 2:
-            return False
+        scores = similar_pages['scores']
+        if scores.size < 2:
+            return float('inf')
 
-        # Sort by similarity descending
-        sorted_pages = sorted(similar_pages, key=lambda p: p['similarity'], reverse=True)
+        return top_score - float(np.partition(scores, -2)[-2])
 
-        if len(sorted_pages) >= 2:
-            second_score = sorted_pages[1]['similarity']
-            gap = top_score - second_score
+    def _is_ambiguous(self, top_score: float, similar_pages: dict) -> bool:
+        """
+        Check if the match is ambiguous (top 2 scores are very close).
 
-            # If gap is less than threshold, it's ambiguous
-            return gap < Config.AMBIGUITY_GAP_THRESHOLD
+        Args:
+            top_score: The highest similarity score.
+            similar_pages: All candidates as 'urls' and 'scores' arrays.
 
-        return False
+        Returns:
+            True if ambiguous (needs review).
+        """
+        # If gap is less than threshold, it's ambiguous
+        return self._score_gap(top_score, similar_pages) < Config.AMBIGUITY_GAP_THRESHOLD
 
 
 # =========================
@@ -843,6 +1448,8 @@ class Mapping:
     Represents a mapping between an old page and a new page.
     Used to track redirect relationships with confidence scoring.
     """
+    __slots__ = ('old_page', 'new_page', 'confidence_score', 'match_type', 'needs_review')
+
     def __init__(
         self,
         old_page: WebPage,
@@ -858,7 +1465,7 @@ class Mapping:
             old_page: WebPage from the old site.
             new_page: WebPage from the new site.
             confidence_score: Similarity score (0.0 to 1.0).
-            match_type: Type of match ('exact_html', 'semantic_high', 'semantic_medium', 'semantic_low').
+            match_type: Type of match ('exact_html', 'near_html', 'semantic_high', 'semantic_medium', 'semantic_low').
             needs_review: Whether this mapping should be reviewed by a human.
         """
         self.old_page = old_page
@@ -868,8 +1475,12 @@ class Mapping:
         self.needs_review = needs_review
 
     def __hash__(self) -> int:
-        """Hash based on the old and new page combination."""
-        return hash(self.old_page) ^ hash(self.new_page)
+        """
+        Hash based on the old and new page combination.
+        Hashed as a tuple rather than XORed: exact HTML matches have equal page
+        hashes, which XOR would collapse to 0 for every such mapping.
+        """
+        return hash((self.old_page, self.new_page))
 
     def __eq__(self, other) -> bool:
         """Equality based on old and new page combination."""
@@ -885,10 +1496,21 @@ class Mapping:
 
 
 class WebPage:
+    """
+    A scraped page: its URL and decoded HTML.
+    The HTML stays resident for the whole pipeline since HtmlPruneStage keys on
+    it and EmbedStage later extracts text from every page no earlier stage
+    matched; which pages those are isn't known until HtmlPruneStage has run.
+    """
+    # Fixed slots: large migrations hold tens of thousands of pages in memory
+    __slots__ = ('url', 'html', '__html_cache', '_extracted_text', '_title')
+
     def __init__(self, url: str, html: str):
         self.url = url
         self.html = html
-        self.__html_cache = None
+        # Hash once up front: every scraped page is keyed by HtmlPruneStage,
+        # so deferring it only moves the work into its loop.
+        self.__html_cache = hash(html)
         self._extracted_text = None
         self._title = None
 
@@ -941,64 +1563,116 @@ class WebPage:
 
         return WebPage(url, html)
 
-    def extract_text(self) -> str:
-        if self._extracted_text is not None:
-            return self._extracted_text
-
-        try:
-            soup = BeautifulSoup(self.html, "lxml")
-
-            # Remove scripts/styles/nav/etc.
-            for tag in soup(["script", "style", "nav", "header", "footer", "aside", "noscript"]):
-                tag.decompose()
-
-            main = soup.find("main") or soup.find("article") or soup.find("body") or soup
-            text = main.get_text(" ", strip=True)
+    # Boilerplate elements whose text is excluded from extract_text()
+    _NON_CONTENT_TAGS = ("script", "style", "nav", "header", "footer", "aside", "noscript")
 
-            text = " ".join(text.split())
+    # Parsed (text, title) by BLAKE2b-128 of the HTML, shared by all pages so
+    # identical HTML (e.g. an unchanged page on both sites) is parsed once.
+    # Least recently used entries are evicted beyond PARSE_CACHE_SIZE.
+    PARSE_CACHE_SIZE = 4096
+    _parse_cache: ClassVar[OrderedDict[bytes, tuple[Optional[str], str]]] = OrderedDict()
+    # Pages are parsed from worker threads (see EmbedStage._prepare_texts)
+    _parse_cache_lock: ClassVar[threading.Lock] = threading.Lock()
 
-            if len(text) > 32000:
-                text = text[:32000]
+    def extract_text(self) -> str:
+        if self._extracted_text is None:
+            self._parse()
+        return self._extracted_text
 
-            if len(text) < 10:
-                text = self.url
+    def extract_title(self) -> str:
+        if self._title is None:
+            self._parse()
+        return self._title
 
-            self._extracted_text = text
-            return text
+    def _parse(self):
+        """
+        Memoize the page's main text and title, parsing its HTML only if no
+        page with identical HTML has been parsed yet.
 
-        except Exception:
-            self._extracted_text = self.url
-            return self.url
+        Falls back to the URL as text when there is too little of it.
+        """
+        key = hashlib.blake2b(self.html.encode('utf-8'), digest_size=16).digest()
+        cache = WebPage._parse_cache
+
+        with WebPage._parse_cache_lock:
+            parsed = cache.get(key)
+            if parsed is not None:
+                cache.move_to_end(key)
+
+        if parsed is None:
+            parsed = self._parse_html(self.html)
+            with WebPage._parse_cache_lock:
+                cache[key] = parsed
+                if len(cache) > self.PARSE_CACHE_SIZE:
+                    cache.popitem(last=False)
+
+        text, self._title = parsed
+        self._extracted_text = text if text is not None else self.url
+
+    @classmethod
+    def _parse_html(cls, html: str) -> tuple[Optional[str], str]:
+        """
+        Parse HTML once with lxml and extract its main text and title.
 
-    def extract_title(self) -> str:
-        if self._title is not None:
-            return self._title
+        Returns:
+            (text, title). text is None if the HTML can't be parsed or has
+            under 10 characters of text; title is "" if there is none.
+        """
+        # lxml rejects str input that carries an encoding declaration, so drop
+        # the XML prolog XHTML pages start with
+        stripped = html.lstrip()
+        if stripped.startswith('<?xml'):
+            html = stripped.partition('?>')[2]
 
         try:
-            soup = BeautifulSoup(self.html, "lxml")
-            title = soup.find("title")
-            if title and title.string:
-                self._title = title.string.strip()
-                return self._title
-
-            h1 = soup.find("h1")
-            if h1:
-                self._title = h1.get_text(strip=True)
-                return self._title
-
-            self._title = ""
-            return ""
+            root = lxml.html.document_fromstring(html)
         except Exception:
-            self._title = ""
-            return ""
+            return None, ""
+
+        # Title before boilerplate removal, since the <h1> fallback may sit in a <header>
+        title = root.find(".//title")
+        if title is not None and title.text:
+            title = title.text.strip()
+        else:
+            h1 = root.find(".//h1")
+            title = "".join(s.strip() for s in h1.itertext()) if h1 is not None else ""
+
+        # Emptying (rather than dropping) keeps the tail text as its own string,
+        # so it isn't glued to the text before the removed element
+        for element in list(root.iter(*cls._NON_CONTENT_TAGS)):
+            element.clear(keep_tail=True)
+
+        main = root.find(".//main")
+        if main is None:
+            main = root.find(".//article")
+        if main is None:
+            main = root.find("body")
+        if main is None:
+            main = root
+
+        # Collapse whitespace node by node and stop once the 32000-character
+        # limit is reached, rather than normalizing all of a huge page first
+        words = []
+        length = -1
+        for chunk in main.itertext():
+            for word in chunk.split():
+                words.append(word)
+                length += len(word) + 1
+            if length >= 32000:
+                break
+
+        text = " ".join(words)[:32000]
+
+        if len(text) < 10:
+            return None, title
+
+        return text, title
 
     def __hash__(self):
         """
         Hash based on HTML content for detecting duplicate content across different URLs.
         Note: Empty or very short HTML is filtered out before hashing in HtmlPruneStage.
         """
-        if self.__html_cache is None:
-            self.__html_cache = hash(self.html)
         return self.__html_cache
 
     def __eq__(self, other):
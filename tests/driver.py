@@ -1,19 +1,47 @@
+import io
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
 parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(parent_dir)
 
 import unittest
 
-# Import all test modules
-import stage_tests.html_prune_test
-import stage_tests.test_url_prune_stage
-import stage_tests.test_embed_stage
-import stage_tests.test_pairing_stage
-import stage_tests.test_text_extraction
-import integration_tests.test_embed_pairing_integration
-import integration_tests.test_full_pipeline_e2e
+# Test modules, each run in its own worker process. They share no state
+# (integration servers bind ephemeral ports), so they can run side by side.
+TEST_MODULES = [
+    'stage_tests.html_prune_test',
+    'stage_tests.test_url_prune_stage',
+    'stage_tests.test_embed_stage',
+    'stage_tests.test_pairing_stage',
+    'stage_tests.test_text_extraction',
+    'integration_tests.test_embed_pairing_integration',
+    'integration_tests.test_full_pipeline_e2e',
+]
+
+
+def run_module(name: str) -> tuple[str, bool]:
+    """
+    Run one test module and capture its report.
+
+    Returns:
+        (report, success) for the module.
+    """
+    suite = unittest.defaultTestLoader.loadTestsFromName(name)
+    stream = io.StringIO()
+    result = unittest.TextTestRunner(stream=stream, verbosity=1).run(suite)
+    return f"== {name}\n{stream.getvalue()}", result.wasSuccessful()
+
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    # Optional module names on the command line narrow the run
+    modules = sys.argv[1:] or TEST_MODULES
+
+    with ProcessPoolExecutor() as pool:
+        outcomes = list(pool.map(run_module, modules))
+
+    for report, _ in outcomes:
+        print(report)
+
+    sys.exit(0 if all(success for _, success in outcomes) else 1)
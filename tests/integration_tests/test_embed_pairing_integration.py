@@ -6,11 +6,15 @@ to final URL pairing with confidence scores.
 """
 
 import unittest
-import asyncio
+import base64
+import functools
+import hashlib
 import os
 import sys
+from contextlib import ExitStack
 from pathlib import Path
-from unittest.mock import AsyncMock, MagicMock, patch, call
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch, call
 import numpy as np
 from uuid import uuid4, UUID
 from typing import List
@@ -62,11 +66,17 @@ def load_mock_site_pages(site_dir: str, limit: int = None) -> List[WebPage]:
     return pages
 
 
+# Mock embeddings keyed by SHA-256 of the embedded text, shared across tests
+_emb_cache: dict[bytes, np.ndarray] = {}
+
+
 def mock_embedding_generator(text: str) -> np.ndarray:
     """
     Generate deterministic mock embeddings based on text content.
 
-    Similar text will produce similar embeddings.
+    Similar text will produce similar embeddings. Results are cached by
+    SHA-256 of the text, so repeated content is only generated once; the
+    returned arrays are shared and read-only.
 
     Args:
         text: Text content to embed
@@ -74,8 +84,13 @@ def mock_embedding_generator(text: str) -> np.ndarray:
     Returns:
         1536-dimensional numpy array (float32)
     """
-    # Use text hash as seed for reproducibility
-    seed = hash(text) % (2**32)
+    key = hashlib.sha256(text.encode()).digest()
+    cached = _emb_cache.get(key)
+    if cached is not None:
+        return cached
+
+    # Seed from the content digest; str hash() is randomized per process (PYTHONHASHSEED)
+    seed = int.from_bytes(key[:4], 'little')
     rng = np.random.RandomState(seed)
 
     # Generate embedding
@@ -86,32 +101,137 @@ def mock_embedding_generator(text: str) -> np.ndarray:
     if norm > 0:
         embedding = embedding / norm
 
+    embedding.setflags(write=False)
+    _emb_cache[key] = embedding
     return embedding
 
 
-def calculate_cosine_similarity(vec1: np.ndarray, vec2: np.ndarray) -> float:
-    """Calculate cosine similarity between two vectors."""
-    dot_product = np.dot(vec1, vec2)
-    norm1 = np.linalg.norm(vec1)
-    norm2 = np.linalg.norm(vec2)
+# Patch targets for the stage dependencies the tests stub out, by short name
+STAGE_PATCH_TARGETS = {
+    'validate': 'src.redirx.stages.Config.validate_embeddings',
+    'openai': 'src.redirx.stages.AsyncOpenAI',
+    'get_embeddings': 'src.redirx.stages.WebPageEmbeddingDB.get_embeddings_by_session',
+    'insert_embeddings': 'src.redirx.stages.WebPageEmbeddingDB.insert_embeddings',
+    'insert_mapping': 'src.redirx.stages.URLMappingDB.insert_mapping',
+}
+
+
+def stored_embedding_records(mock_insert) -> list:
+    """
+    Flatten the calls to a mocked insert_embeddings into one dict per page.
+
+    Each record also carries the session_id and site_type of its call.
+    """
+    return [
+        {**record, 'session_id': c[1]['session_id'], 'site_type': c[1]['site_type']}
+        for c in mock_insert.call_args_list
+        for record in c[1]['records']
+    ]
+
+
+def embeddings_with_similarities(*similarities, offset=0):
+    """
+    Build a unit query vector plus one unit vector per similarity, each with
+    exactly that cosine similarity to the query.
+
+    Only axes from `offset` onward are used, so sets built at offsets at least
+    len(similarities) + 1 apart are orthogonal to each other.
+
+    Returns:
+        (query, [candidate, ...]) as lists of floats, like stored embeddings
+    """
+    query = np.zeros(1536)
+    query[offset] = 1.0
+    candidates = []
+    for i, similarity in enumerate(similarities):
+        candidate = np.zeros(1536)
+        candidate[offset] = similarity
+        candidate[offset + 1 + i] = np.sqrt(1.0 - similarity ** 2)
+        candidates.append(candidate.tolist())
+    return query.tolist(), candidates
+
+
+def serve_embeddings(mock_get_embeddings, old: list, new: list):
+    """Serve embedding records from a mocked get_embeddings_by_session by site type."""
+    records = {'old': old, 'new': new}
+    mock_get_embeddings.side_effect = lambda session_id, site_type=None, columns='*': records[site_type]
+
+
+def with_stage_mocks(*names):
+    """
+    Patch the named stage dependencies for the duration of an async test.
+
+    Replaces a stack of @patch decorators (and their reversed positional
+    arguments) with a single ExitStack; the mocks are passed to the test as
+    one namespace, e.g. `mocks.insert_mapping`.
+
+    Args:
+        names: Keys of STAGE_PATCH_TARGETS to patch
+    """
+    def decorator(test):
+        @functools.wraps(test)
+        async def wrapper(self, *args, **kwargs):
+            with ExitStack() as stack:
+                mocks = SimpleNamespace(**{
+                    name: stack.enter_context(patch(STAGE_PATCH_TARGETS[name]))
+                    for name in names
+                })
+                return await test(self, mocks, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def make_embedding_response(*embeddings) -> SimpleNamespace:
+    """
+    Build a stand-in for an OpenAI embeddings response.
+
+    Exposes the same `.data[i].embedding` access path as the real response,
+    one entry per embedding, without the per-call attribute bookkeeping of
+    MagicMock. Embeddings are base64-encoded float32, as EmbedStage requests.
+    """
+    return SimpleNamespace(data=[
+        SimpleNamespace(embedding=base64.b64encode(np.asarray(e, dtype=np.float32).tobytes()).decode())
+        for e in embeddings
+    ])
+
 
-    if norm1 == 0 or norm2 == 0:
-        return 0.0
+def constant_embedding_create(embedding):
+    """
+    Build a fake `embeddings.create` that returns `embedding` for every input.
 
-    return float(dot_product / (norm1 * norm2))
+    EmbedStage sends batches of texts, so the response needs one entry per input.
+    """
+    return AsyncMock(
+        side_effect=lambda input, model, **kwargs: make_embedding_response(*[embedding] * len(input))
+    )
 
 
 # ============================================================================
 # Integration Test Suite
 # ============================================================================
 
-class TestEmbedPairingIntegration(unittest.TestCase):
+class TestEmbedPairingIntegration(unittest.IsolatedAsyncioTestCase):
     """Integration tests for EmbedStage + PairingStage workflow."""
 
+    @classmethod
+    def setUpClass(cls):
+        """Load the mock site subsets once for the whole class."""
+        old_site_path = os.path.join(parent_dir, 'tests', 'mock_sites', 'old_site')
+        new_site_path = os.path.join(parent_dir, 'tests', 'mock_sites', 'new_site')
+
+        # Stored as tuples so tests can't mutate the shared fixtures
+        cls._old_pages_cache = tuple(load_mock_site_pages(old_site_path, limit=5))
+        cls._new_pages_cache = tuple(load_mock_site_pages(new_site_path, limit=5))
+
     def setUp(self):
         """Set up test fixtures."""
         self.session_id = uuid4()
 
+        # Keep EmbedStage off the cross-session embedding cache table
+        cache_patch = patch('src.redirx.stages.Config.EMBEDDING_CACHE_ENABLED', False)
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+
         # Create simple test pages
         self.old_page_1 = WebPage(
             'http://old.com/products',
@@ -143,51 +263,34 @@ class TestEmbedPairingIntegration(unittest.TestCase):
     # Test 1: Full Workflow with Mocked Services
     # ========================================================================
 
-    @patch('src.redirx.stages.URLMappingDB.insert_mapping')
-    @patch('src.redirx.stages.WebPageEmbeddingDB.insert_embedding')
-    @patch('src.redirx.stages.WebPageEmbeddingDB.find_similar_pages')
-    @patch('src.redirx.stages.WebPageEmbeddingDB.get_embeddings_by_session')
-    @patch('src.redirx.stages.AsyncOpenAI')
-    @patch('src.redirx.stages.Config.validate_embeddings')
-    async def test_full_workflow_with_mocked_services(
-        self,
-        mock_validate,
-        mock_openai,
-        mock_get_embeddings,
-        mock_find_similar,
-        mock_insert_embedding,
-        mock_insert_mapping
-    ):
+    @with_stage_mocks('insert_mapping', 'insert_embeddings', 'get_embeddings', 'openai', 'validate')
+    async def test_full_workflow_with_mocked_services(self, mocks):
         """Test complete EmbedStage → PairingStage workflow with mocks."""
         # Setup OpenAI mock
         mock_client = AsyncMock()
-        mock_response = MagicMock()
-        mock_response.data = [MagicMock()]
-        mock_response.data[0].embedding = [0.1] * 1536
-        mock_client.embeddings.create = AsyncMock(return_value=mock_response)
-        mock_openai.return_value = mock_client
+        mock_client.embeddings.create = constant_embedding_create([0.1] * 1536)
+        mocks.openai.return_value = mock_client
 
         # Setup test data
         old_pages = [self.old_page_1, self.old_page_2]
         new_pages = [self.new_page_1, self.new_page_2]
         mappings = set()
 
-        # Mock embeddings database responses
-        mock_get_embeddings.return_value = [
-            {'url': 'http://old.com/products', 'embedding': mock_embedding_generator('products').tolist()},
-            {'url': 'http://old.com/services', 'embedding': mock_embedding_generator('services').tolist()}
-        ]
-
-        # Mock similarity search
-        def mock_find_similar_impl(query_embedding, session_id, site_type, match_count, match_threshold):
-            # Determine which old page based on similarity to products/services
-            products_emb = mock_embedding_generator('products')
-            if calculate_cosine_similarity(query_embedding, products_emb) > 0.9:
-                return [{'url': 'http://new.com/products', 'similarity': 0.92}]
-            else:
-                return [{'url': 'http://new.com/solutions', 'similarity': 0.88}]
-
-        mock_find_similar.side_effect = mock_find_similar_impl
+        # Mock embeddings database responses:
+        # products -> products (0.92), services -> solutions (0.88)
+        products_old, (products_new,) = embeddings_with_similarities(0.92, offset=0)
+        services_old, (solutions_new,) = embeddings_with_similarities(0.88, offset=10)
+        serve_embeddings(
+            mocks.get_embeddings,
+            old=[
+                {'url': 'http://old.com/products', 'embedding': products_old},
+                {'url': 'http://old.com/services', 'embedding': services_old}
+            ],
+            new=[
+                {'url': 'http://new.com/products', 'embedding': products_new},
+                {'url': 'http://new.com/solutions', 'embedding': solutions_new}
+            ]
+        )
 
         # Execute EmbedStage
         embed_stage = EmbedStage(session_id=self.session_id)
@@ -199,7 +302,7 @@ class TestEmbedPairingIntegration(unittest.TestCase):
         self.assertEqual(result_after_embed[1], new_pages)
 
         # Verify embeddings were inserted (4 total: 2 old + 2 new)
-        self.assertEqual(mock_insert_embedding.call_count, 4)
+        self.assertEqual(len(stored_embedding_records(mocks.insert_embeddings)), 4)
 
         # Execute PairingStage
         pairing_stage = PairingStage(session_id=self.session_id)
@@ -210,115 +313,75 @@ class TestEmbedPairingIntegration(unittest.TestCase):
         self.assertEqual(len(result_after_pairing[2]), 2)  # 2 mappings created
 
         # Verify mappings were inserted
-        self.assertEqual(mock_insert_mapping.call_count, 2)
+        self.assertEqual(mocks.insert_mapping.call_count, 2)
 
     # ========================================================================
     # Test 2: Confidence Scoring Accuracy
     # ========================================================================
 
-    @patch('src.redirx.stages.URLMappingDB.insert_mapping')
-    @patch('src.redirx.stages.WebPageEmbeddingDB.find_similar_pages')
-    @patch('src.redirx.stages.WebPageEmbeddingDB.get_embeddings_by_session')
-    async def test_confidence_scoring_accuracy(
-        self,
-        mock_get_embeddings,
-        mock_find_similar,
-        mock_insert_mapping
-    ):
+    @with_stage_mocks('insert_mapping', 'get_embeddings')
+    async def test_confidence_scoring_accuracy(self, mocks):
         """Test that confidence scores produce correct match types and review flags."""
         pairing_stage = PairingStage(session_id=self.session_id)
 
-        old_pages = [self.old_page_1]
-        new_pages = [self.new_page_1, self.new_page_2]
-        mappings = set()
-
-        # Mock embeddings
-        mock_get_embeddings.return_value = [{
-            'url': 'http://old.com/products',
-            'embedding': [0.1] * 1536
-        }]
-
-        # Test high confidence (0.95)
-        mock_find_similar.return_value = [
-            {'url': 'http://new.com/products', 'similarity': 0.95}
+        # One old/new page pair per confidence tier, scored in a single execute:
+        # (slug, candidate similarities, expected match_type, expected needs_review)
+        cases = [
+            ('high', [0.95], 'semantic_high', False),
+            ('medium-clear', [0.85, 0.70], 'semantic_medium', False),  # Clear winner
+            ('medium-ambiguous', [0.85, 0.82], 'semantic_medium', True),  # Gap < 0.1
+            ('low', [0.75], 'semantic_low', True),
+            ('below-threshold', [0.50], None, None),  # Should not create mapping
         ]
 
-        await pairing_stage.execute((old_pages, new_pages, mappings))
-
-        call_kwargs = mock_insert_mapping.call_args[1]
-        self.assertEqual(call_kwargs['confidence_score'], 0.95)
-        self.assertEqual(call_kwargs['match_type'], 'semantic_high')
-        self.assertFalse(call_kwargs['needs_review'])
-
-        # Reset for next test
-        mock_insert_mapping.reset_mock()
-
-        # Test medium confidence with clear winner (0.85 vs 0.70)
-        mock_find_similar.return_value = [
-            {'url': 'http://new.com/products', 'similarity': 0.85},
-            {'url': 'http://new.com/solutions', 'similarity': 0.70}
+        old_pages = [
+            WebPage(f'http://old.com/{slug}', f'<html><body><h1>Old {slug}</h1></body></html>')
+            for slug, *_ in cases
         ]
-
-        await pairing_stage.execute((old_pages, new_pages, mappings))
-
-        call_kwargs = mock_insert_mapping.call_args[1]
-        self.assertEqual(call_kwargs['match_type'], 'semantic_medium')
-        self.assertFalse(call_kwargs['needs_review'])  # Clear winner
-
-        # Reset for next test
-        mock_insert_mapping.reset_mock()
-
-        # Test medium confidence with ambiguity (0.85 vs 0.82)
-        mock_find_similar.return_value = [
-            {'url': 'http://new.com/products', 'similarity': 0.85},
-            {'url': 'http://new.com/solutions', 'similarity': 0.82}  # Gap < 0.1
+        new_pages = [
+            WebPage(f'http://new.com/{slug}', f'<html><body><h1>New {slug}</h1></body></html>')
+            for slug, *_ in cases
         ]
+        mappings = set()
 
-        await pairing_stage.execute((old_pages, new_pages, mappings))
-
-        call_kwargs = mock_insert_mapping.call_args[1]
-        self.assertEqual(call_kwargs['match_type'], 'semantic_medium')
-        self.assertTrue(call_kwargs['needs_review'])  # Ambiguous
-
-        # Reset for next test
-        mock_insert_mapping.reset_mock()
-
-        # Test low confidence (0.65)
-        mock_find_similar.return_value = [
-            {'url': 'http://new.com/products', 'similarity': 0.65}
-        ]
+        # Each case's embeddings are orthogonal to every other case's;
+        # runner-ups point at URLs that aren't part of the new site
+        old_records, new_records = [], []
+        for i, (slug, scores, *_) in enumerate(cases):
+            query, candidates = embeddings_with_similarities(*scores, offset=10 * i)
+            old_records.append({'url': f'http://old.com/{slug}', 'embedding': query})
+            new_records.extend(
+                {'url': f'http://new.com/{slug}' if rank == 0 else f'http://new.com/{slug}-alt',
+                 'embedding': candidate}
+                for rank, candidate in enumerate(candidates)
+            )
+        serve_embeddings(mocks.get_embeddings, old=old_records, new=new_records)
 
         await pairing_stage.execute((old_pages, new_pages, mappings))
 
-        call_kwargs = mock_insert_mapping.call_args[1]
-        self.assertEqual(call_kwargs['match_type'], 'semantic_low')
-        self.assertTrue(call_kwargs['needs_review'])
-
-        # Reset for next test
-        mock_insert_mapping.reset_mock()
+        inserted = {
+            call_args[1]['old_url']: call_args[1]
+            for call_args in mocks.insert_mapping.call_args_list
+        }
 
-        # Test below threshold (0.50) - should not create mapping
-        mock_find_similar.return_value = [
-            {'url': 'http://new.com/products', 'similarity': 0.50}
-        ]
-
-        await pairing_stage.execute((old_pages, new_pages, mappings))
+        for slug, scores, match_type, needs_review in cases:
+            with self.subTest(case=slug):
+                call_kwargs = inserted.get(f'http://old.com/{slug}')
+                if match_type is None:
+                    self.assertIsNone(call_kwargs)  # No mapping created
+                    continue
+                self.assertAlmostEqual(call_kwargs['confidence_score'], scores[0], places=5)
+                self.assertEqual(call_kwargs['match_type'], match_type)
+                self.assertEqual(call_kwargs['needs_review'], needs_review)
 
-        mock_insert_mapping.assert_not_called()  # No mapping created
+        self.assertEqual(mocks.insert_mapping.call_count, 4)
 
     # ========================================================================
     # Test 3: Orphaned and New Page Identification
     # ========================================================================
 
-    @patch('src.redirx.stages.URLMappingDB.insert_mapping')
-    @patch('src.redirx.stages.WebPageEmbeddingDB.find_similar_pages')
-    @patch('src.redirx.stages.WebPageEmbeddingDB.get_embeddings_by_session')
-    async def test_orphaned_and_new_page_identification(
-        self,
-        mock_get_embeddings,
-        mock_find_similar,
-        mock_insert_mapping
-    ):
+    @with_stage_mocks('insert_mapping', 'get_embeddings')
+    async def test_orphaned_and_new_page_identification(self, mocks):
         """Test that orphaned and new pages are correctly identified."""
         pairing_stage = PairingStage(session_id=self.session_id)
 
@@ -331,31 +394,30 @@ class TestEmbedPairingIntegration(unittest.TestCase):
         new_pages = [self.new_page_1, self.new_page_new]
         mappings = set()
 
-        # Mock embeddings
-        mock_get_embeddings.return_value = [
-            {'url': 'http://old.com/products', 'embedding': [0.1] * 1536},
-            {'url': 'http://old.com/legacy-feature', 'embedding': [0.9] * 1536}
-        ]
-
-        # Mock similarity: products match, legacy does not
-        def mock_find_impl(query_embedding, session_id, site_type, match_count, match_threshold):
-            if np.allclose(query_embedding, [0.1] * 1536):
-                return [{'url': 'http://new.com/products', 'similarity': 0.90}]
-            else:
-                # Legacy page has no good match
-                return [{'url': 'http://new.com/innovations', 'similarity': 0.45}]
-
-        mock_find_similar.side_effect = mock_find_impl
+        # Mock similarity: products match, legacy has no good match
+        products_old, (products_new,) = embeddings_with_similarities(0.90, offset=0)
+        legacy_old, (innovations_new,) = embeddings_with_similarities(0.45, offset=10)
+        serve_embeddings(
+            mocks.get_embeddings,
+            old=[
+                {'url': 'http://old.com/products', 'embedding': products_old},
+                {'url': 'http://old.com/legacy-feature', 'embedding': legacy_old}
+            ],
+            new=[
+                {'url': 'http://new.com/products', 'embedding': products_new},
+                {'url': 'http://new.com/innovations', 'embedding': innovations_new}
+            ]
+        )
 
         # Execute
         result = await pairing_stage.execute((old_pages, new_pages, mappings))
 
         # Verify only 1 mapping created (products)
-        self.assertEqual(mock_insert_mapping.call_count, 1)
+        self.assertEqual(mocks.insert_mapping.call_count, 1)
         self.assertEqual(len(result[2]), 1)
 
         # Verify correct mapping was created
-        call_kwargs = mock_insert_mapping.call_args[1]
+        call_kwargs = mocks.insert_mapping.call_args[1]
         self.assertEqual(call_kwargs['old_url'], 'http://old.com/products')
         self.assertEqual(call_kwargs['new_url'], 'http://new.com/products')
 
@@ -366,15 +428,8 @@ class TestEmbedPairingIntegration(unittest.TestCase):
     # Test 4: HtmlPrune Mappings Integration
     # ========================================================================
 
-    @patch('src.redirx.stages.URLMappingDB.insert_mapping')
-    @patch('src.redirx.stages.WebPageEmbeddingDB.find_similar_pages')
-    @patch('src.redirx.stages.WebPageEmbeddingDB.get_embeddings_by_session')
-    async def test_htmlprune_mappings_integration(
-        self,
-        mock_get_embeddings,
-        mock_find_similar,
-        mock_insert_mapping
-    ):
+    @with_stage_mocks('insert_mapping', 'get_embeddings')
+    async def test_htmlprune_mappings_integration(self, mocks):
         """Test that existing HtmlPruneStage mappings are handled correctly."""
         pairing_stage = PairingStage(session_id=self.session_id)
 
@@ -391,17 +446,13 @@ class TestEmbedPairingIntegration(unittest.TestCase):
         new_pages = [self.new_page_1, self.new_page_2]
         mappings = {existing_mapping}
 
-        # Mock embeddings for unmatched page (old_page_2)
-        mock_get_embeddings.return_value = [{
-            'url': 'http://old.com/services',
-            'embedding': [0.2] * 1536
-        }]
-
-        # Mock similarity for services
-        mock_find_similar.return_value = [{
-            'url': 'http://new.com/solutions',
-            'similarity': 0.88
-        }]
+        # Mock embeddings for unmatched page (old_page_2) and its counterpart
+        services_old, (solutions_new,) = embeddings_with_similarities(0.88)
+        serve_embeddings(
+            mocks.get_embeddings,
+            old=[{'url': 'http://old.com/services', 'embedding': services_old}],
+            new=[{'url': 'http://new.com/solutions', 'embedding': solutions_new}]
+        )
 
         # Execute
         result = await pairing_stage.execute((old_pages, new_pages, mappings))
@@ -410,15 +461,15 @@ class TestEmbedPairingIntegration(unittest.TestCase):
         self.assertEqual(len(result[2]), 2)
 
         # Verify 2 inserts: existing mapping + new mapping
-        self.assertEqual(mock_insert_mapping.call_count, 2)
+        self.assertEqual(mocks.insert_mapping.call_count, 2)
 
         # First call should be for existing mapping
-        first_call = mock_insert_mapping.call_args_list[0][1]
+        first_call = mocks.insert_mapping.call_args_list[0][1]
         self.assertEqual(first_call['match_type'], 'exact_html')
         self.assertEqual(first_call['confidence_score'], 1.0)
 
         # Second call should be for new semantic mapping
-        second_call = mock_insert_mapping.call_args_list[1][1]
+        second_call = mocks.insert_mapping.call_args_list[1][1]
         self.assertEqual(second_call['old_url'], 'http://old.com/services')
         self.assertEqual(second_call['new_url'], 'http://new.com/solutions')
 
@@ -426,40 +477,24 @@ class TestEmbedPairingIntegration(unittest.TestCase):
     # Test 5: Full Mock Site Workflow
     # ========================================================================
 
-    @patch('src.redirx.stages.URLMappingDB.insert_mapping')
-    @patch('src.redirx.stages.WebPageEmbeddingDB.insert_embedding')
-    @patch('src.redirx.stages.AsyncOpenAI')
-    @patch('src.redirx.stages.Config.validate_embeddings')
-    async def test_full_mock_site_workflow(
-        self,
-        mock_validate,
-        mock_openai,
-        mock_insert_embedding,
-        mock_insert_mapping
-    ):
+    @with_stage_mocks('insert_mapping', 'insert_embeddings', 'openai', 'validate')
+    async def test_full_mock_site_workflow(self, mocks):
         """Test with real mock site HTML files (limited subset for speed)."""
         # Setup OpenAI mock
         mock_client = AsyncMock()
 
         def mock_create_embedding(input, model, **kwargs):
-            # Generate deterministic embeddings based on input text
+            # Generate deterministic embeddings for each text in the batch
             # Accept **kwargs to handle encoding_format and other params
-            text = input if isinstance(input, str) else input[0]
-            embedding = mock_embedding_generator(text)
-            mock_response = MagicMock()
-            mock_response.data = [MagicMock()]
-            mock_response.data[0].embedding = embedding.tolist()
-            return mock_response
+            texts = [input] if isinstance(input, str) else input
+            return make_embedding_response(*(mock_embedding_generator(text) for text in texts))
 
         mock_client.embeddings.create = AsyncMock(side_effect=mock_create_embedding)
-        mock_openai.return_value = mock_client
-
-        # Load subset of mock site pages (5 each for speed)
-        old_site_path = os.path.join(parent_dir, 'tests', 'mock_sites', 'old_site')
-        new_site_path = os.path.join(parent_dir, 'tests', 'mock_sites', 'new_site')
+        mocks.openai.return_value = mock_client
 
-        old_pages = load_mock_site_pages(old_site_path, limit=5)
-        new_pages = load_mock_site_pages(new_site_path, limit=5)
+        # Subset of mock site pages (5 each for speed), loaded once in setUpClass
+        old_pages = list(self._old_pages_cache)
+        new_pages = list(self._new_pages_cache)
 
         # Verify pages loaded
         self.assertGreater(len(old_pages), 0)
@@ -471,50 +506,53 @@ class TestEmbedPairingIntegration(unittest.TestCase):
 
         # Verify embeddings were created
         expected_embeddings = len(old_pages) + len(new_pages)
-        self.assertEqual(mock_insert_embedding.call_count, expected_embeddings)
+        self.assertEqual(len(stored_embedding_records(mocks.insert_embeddings)), expected_embeddings)
+
+        # EmbedStage sends each distinct text to the API once
+        embedded_texts = [
+            text
+            for c in mock_client.embeddings.create.call_args_list
+            for text in c[1]['input']
+        ]
+        self.assertEqual(len(embedded_texts), len(set(embedded_texts)))
 
         # Setup mocks for PairingStage
-        # Mock get_embeddings to return stored embeddings
-        stored_embeddings = []
-        for call in mock_insert_embedding.call_args_list:
-            kwargs = call[1]
-            stored_embeddings.append({
-                'url': kwargs['url'],
-                'embedding': kwargs['embedding'],
-                'site_type': kwargs['site_type']
-            })
+        # Store embeddings as one (N, 1536) float32 matrix with parallel url/site_type arrays
+        stored_calls = stored_embedding_records(mocks.insert_embeddings)
+        for kwargs in stored_calls:
+            # Mock responses carry ndarrays straight through EmbedStage, no list round-trip
+            self.assertIs(type(kwargs['embedding']), np.ndarray)
+
+        stored_embeddings = np.empty((len(stored_calls), 1536), dtype=np.float32)
+        stored_urls = []
+        stored_site_types = np.empty(len(stored_calls), dtype='U3')
+        for i, kwargs in enumerate(stored_calls):
+            stored_embeddings[i] = np.asarray(kwargs['embedding'], dtype=np.float32)
+            stored_urls.append(kwargs['url'])
+            stored_site_types[i] = kwargs['site_type']
+
+        site_type_rows = {
+            site_type: np.flatnonzero(stored_site_types == site_type)
+            for site_type in ('old', 'new')
+        }
 
         # Execute PairingStage with mock database
-        with patch('src.redirx.stages.WebPageEmbeddingDB.get_embeddings_by_session') as mock_get_emb, \
-             patch('src.redirx.stages.WebPageEmbeddingDB.find_similar_pages') as mock_find_sim:
-
-            # Return old embeddings when queried
-            mock_get_emb.return_value = [e for e in stored_embeddings if e['site_type'] == 'old']
-
-            # Mock find_similar to use actual cosine similarity
-            def mock_find_similar_impl(query_embedding, session_id, site_type, match_count, match_threshold):
-                results = []
-                for emb in stored_embeddings:
-                    if emb['site_type'] == site_type:
-                        similarity = calculate_cosine_similarity(
-                            np.array(query_embedding),
-                            np.array(emb['embedding'])
-                        )
-                        results.append({
-                            'url': emb['url'],
-                            'similarity': float(similarity)
-                        })
-                # Sort by similarity and return top matches
-                results.sort(key=lambda x: x['similarity'], reverse=True)
-                return results[:match_count]
-
-            mock_find_sim.side_effect = mock_find_similar_impl
+        with patch('src.redirx.stages.WebPageEmbeddingDB.get_embeddings_by_session') as mock_get_emb:
+
+            # Return each site's stored embeddings when queried
+            serve_embeddings(mock_get_emb, **{
+                site_type: [
+                    {'url': stored_urls[i], 'embedding': stored_embeddings[i]}
+                    for i in rows
+                ]
+                for site_type, rows in site_type_rows.items()
+            })
 
             pairing_stage = PairingStage(session_id=self.session_id)
             result = await pairing_stage.execute(result_after_embed)
 
             # Verify mappings were created
-            self.assertGreater(mock_insert_mapping.call_count, 0)
+            self.assertGreater(mocks.insert_mapping.call_count, 0)
 
             # Verify result structure
             self.assertEqual(len(result), 3)
@@ -534,15 +572,16 @@ class TestEmbedPairingIntegration(unittest.TestCase):
         new_pages = [self.new_page_1]
 
         # Mock database to avoid actual storage
-        with patch('src.redirx.stages.WebPageEmbeddingDB.insert_embedding') as mock_insert:
+        with patch('src.redirx.stages.WebPageEmbeddingDB.insert_embeddings') as mock_insert:
             result = await embed_stage.execute((old_pages, new_pages, set()))
 
             # Verify embeddings were generated
-            self.assertEqual(mock_insert.call_count, 3)
+            records = stored_embedding_records(mock_insert)
+            self.assertEqual(len(records), 3)
 
             # Verify embedding format
-            for call in mock_insert.call_args_list:
-                embedding = call[1]['embedding']
+            for record in records:
+                embedding = record['embedding']
                 self.assertIsInstance(embedding, (list, np.ndarray))
                 if isinstance(embedding, list):
                     self.assertEqual(len(embedding), 1536)
@@ -567,10 +606,7 @@ class TestEmbedPairingIntegration(unittest.TestCase):
                  patch('src.redirx.stages.Config.validate_embeddings'):
 
                 mock_client = AsyncMock()
-                mock_response = MagicMock()
-                mock_response.data = [MagicMock()]
-                mock_response.data[0].embedding = mock_embedding_generator('test').tolist()
-                mock_client.embeddings.create = AsyncMock(return_value=mock_response)
+                mock_client.embeddings.create = constant_embedding_create(mock_embedding_generator('test'))
                 mock_openai.return_value = mock_client
 
                 # Execute stages
@@ -599,13 +635,8 @@ class TestEmbedPairingIntegration(unittest.TestCase):
     # Test 8: Missing Embeddings Handling
     # ========================================================================
 
-    @patch('src.redirx.stages.URLMappingDB.insert_mapping')
-    @patch('src.redirx.stages.WebPageEmbeddingDB.get_embeddings_by_session')
-    async def test_missing_embeddings_handling(
-        self,
-        mock_get_embeddings,
-        mock_insert_mapping
-    ):
+    @with_stage_mocks('insert_mapping', 'get_embeddings')
+    async def test_missing_embeddings_handling(self, mocks):
         """Test graceful handling when embeddings are missing."""
         pairing_stage = PairingStage(session_id=self.session_id)
 
@@ -613,7 +644,7 @@ class TestEmbedPairingIntegration(unittest.TestCase):
         new_pages = [self.new_page_1]
 
         # Mock: only first page has embedding
-        mock_get_embeddings.return_value = [{
+        mocks.get_embeddings.return_value = [{
             'url': 'http://old.com/products',
             'embedding': [0.1] * 1536
         }]
@@ -629,15 +660,14 @@ class TestEmbedPairingIntegration(unittest.TestCase):
     # Test 9: Empty Input
     # ========================================================================
 
-    @patch('src.redirx.stages.AsyncOpenAI')
-    @patch('src.redirx.stages.Config.validate_embeddings')
-    async def test_empty_input(self, mock_validate, mock_openai):
+    @with_stage_mocks('openai', 'validate')
+    async def test_empty_input(self, mocks):
         """Test handling of empty page lists."""
         embed_stage = EmbedStage(session_id=self.session_id)
         pairing_stage = PairingStage(session_id=self.session_id)
 
         mock_client = AsyncMock()
-        mock_openai.return_value = mock_client
+        mocks.openai.return_value = mock_client
 
         # Test with empty input
         result = await embed_stage.execute(([], [], set()))
@@ -650,40 +680,21 @@ class TestEmbedPairingIntegration(unittest.TestCase):
     # Test 10: Session ID Propagation
     # ========================================================================
 
-    @patch('src.redirx.stages.URLMappingDB.insert_mapping')
-    @patch('src.redirx.stages.WebPageEmbeddingDB.insert_embedding')
-    @patch('src.redirx.stages.WebPageEmbeddingDB.find_similar_pages')
-    @patch('src.redirx.stages.WebPageEmbeddingDB.get_embeddings_by_session')
-    @patch('src.redirx.stages.AsyncOpenAI')
-    @patch('src.redirx.stages.Config.validate_embeddings')
-    async def test_session_id_propagation(
-        self,
-        mock_validate,
-        mock_openai,
-        mock_get_embeddings,
-        mock_find_similar,
-        mock_insert_embedding,
-        mock_insert_mapping
-    ):
+    @with_stage_mocks('insert_mapping', 'insert_embeddings', 'get_embeddings', 'openai', 'validate')
+    async def test_session_id_propagation(self, mocks):
         """Test that session_id is correctly propagated through stages."""
         test_session_id = uuid4()
 
         mock_client = AsyncMock()
-        mock_response = MagicMock()
-        mock_response.data = [MagicMock()]
-        mock_response.data[0].embedding = [0.1] * 1536
-        mock_client.embeddings.create = AsyncMock(return_value=mock_response)
-        mock_openai.return_value = mock_client
-
-        mock_get_embeddings.return_value = [{
-            'url': 'http://old.com/products',
-            'embedding': [0.1] * 1536
-        }]
-
-        mock_find_similar.return_value = [{
-            'url': 'http://new.com/products',
-            'similarity': 0.90
-        }]
+        mock_client.embeddings.create = constant_embedding_create([0.1] * 1536)
+        mocks.openai.return_value = mock_client
+
+        products_old, (products_new,) = embeddings_with_similarities(0.90)
+        serve_embeddings(
+            mocks.get_embeddings,
+            old=[{'url': 'http://old.com/products', 'embedding': products_old}],
+            new=[{'url': 'http://new.com/products', 'embedding': products_new}]
+        )
 
         # Execute with specific session ID
         embed_stage = EmbedStage(session_id=test_session_id)
@@ -696,30 +707,12 @@ class TestEmbedPairingIntegration(unittest.TestCase):
         result = await pairing_stage.execute(result)
 
         # Verify all database operations used correct session_id
-        for call in mock_insert_embedding.call_args_list:
+        for call in mocks.insert_embeddings.call_args_list:
             self.assertEqual(call[1]['session_id'], test_session_id)
 
-        for call in mock_insert_mapping.call_args_list:
+        for call in mocks.insert_mapping.call_args_list:
             self.assertEqual(call[1]['session_id'], test_session_id)
 
 
-# ============================================================================
-# Test Runner Helper
-# ============================================================================
-
-def async_test(coro):
-    """Decorator to run async test methods."""
-    def wrapper(*args, **kwargs):
-        return asyncio.run(coro(*args, **kwargs))
-    return wrapper
-
-
-# Apply async_test decorator to all async test methods
-for attr_name in dir(TestEmbedPairingIntegration):
-    attr = getattr(TestEmbedPairingIntegration, attr_name)
-    if asyncio.iscoroutinefunction(attr) and attr_name.startswith('test_'):
-        setattr(TestEmbedPairingIntegration, attr_name, async_test(attr))
-
-
 if __name__ == '__main__':
     unittest.main()
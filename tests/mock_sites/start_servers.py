@@ -14,27 +14,88 @@ Press Ctrl+C to stop both servers.
 """
 
 import http.server
-import socketserver
+import mimetypes
+import posixpath
+import socket
 import threading
+import time
 import sys
 from pathlib import Path
 from functools import partial
+from urllib.parse import unquote, urlparse
+
+# Asset requests that aren't worth logging
+QUIET_EXTENSIONS = frozenset({'.css', '.js', '.png', '.jpg', '.ico'})
+
+
+def load_site_files(directory) -> dict:
+    """
+    Read every file under a directory into memory.
+
+    Args:
+        directory: Path to the directory to load
+
+    Returns:
+        Dict mapping URL path (e.g. '/blog/index.html') -> (body bytes, content type)
+    """
+    root = Path(directory)
+    files = {}
+    for file_path in root.rglob('*'):
+        if file_path.is_file():
+            url_path = '/' + file_path.relative_to(root).as_posix()
+            content_type = mimetypes.guess_type(file_path.name)[0] or 'application/octet-stream'
+            files[url_path] = (file_path.read_bytes(), content_type)
+    return files
 
 
 def create_handler(directory):
-    """Create a request handler class that serves from a specific directory."""
+    """Create a request handler class that serves a directory from memory."""
+    # The mock sites are static and tiny, so read them once instead of
+    # stat/open/read on every request
+    files = load_site_files(directory)
 
     class CustomHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
-        """HTTP request handler with reduced logging and custom directory."""
+        """HTTP request handler with reduced logging and in-memory content."""
+
+        # Keep connections open between requests; every response sets Content-Length
+        protocol_version = 'HTTP/1.1'
 
         def __init__(self, *args, **kwargs):
             """Initialize with custom directory."""
             super().__init__(*args, directory=directory, **kwargs)
 
+        def do_GET(self):
+            """Serve a file from the in-memory cache."""
+            body = self._send_cached_headers()
+            if body is not None:
+                self.wfile.write(body)
+
+        def do_HEAD(self):
+            """Serve headers for a file from the in-memory cache."""
+            self._send_cached_headers()
+
+        def _send_cached_headers(self):
+            """Send status and headers for the request path, returning the body if found."""
+            path = unquote(self.path.split('?', 1)[0].split('#', 1)[0])
+            if path.endswith('/'):
+                path += 'index.html'
+            entry = files.get(path) or files.get(path + '/index.html')
+            if entry is None:
+                self.send_error(404, "File not found")
+                return None
+
+            body, content_type = entry
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            return body
+
         def log_message(self, format, *args):
             """Override to provide cleaner log messages."""
             # Only log non-asset requests to reduce noise
-            if not any(ext in self.path for ext in ['.css', '.js', '.png', '.jpg', '.ico']):
+            extension = posixpath.splitext(urlparse(self.path).path)[1].lower()
+            if extension not in QUIET_EXTENSIONS:
                 server_name = getattr(self.server, 'server_name', 'Server')
                 print(f"[{server_name}] {self.command} {self.path}")
 
@@ -60,9 +121,9 @@ def serve_directory(directory: Path, port: int, server_name: str):
     # Create handler class for this directory
     handler_class = create_handler(str(directory))
 
-    # Create server with reusable address
-    socketserver.TCPServer.allow_reuse_address = True
-    with socketserver.TCPServer(("", port), handler_class) as httpd:
+    # Threaded server (reusable address, daemon request threads) so concurrent
+    # scraper requests aren't serialized
+    with http.server.ThreadingHTTPServer(("", port), handler_class) as httpd:
         httpd.server_name = server_name
 
         print(f"✓ {server_name} running at http://localhost:{port}")
@@ -74,6 +135,27 @@ def serve_directory(directory: Path, port: int, server_name: str):
             print(f"\n✗ {server_name} stopped")
 
 
+def wait_for_port(port: int, timeout: float = 2.0) -> bool:
+    """
+    Poll until something accepts connections on localhost:port.
+
+    Args:
+        port: Port number to probe
+        timeout: Seconds to keep trying
+
+    Returns:
+        True once the port accepts a connection, False on timeout
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("localhost", port), timeout=0.05).close()
+            return True
+        except OSError:
+            time.sleep(0.005)
+    return False
+
+
 def main():
     """Start both old and new site servers in separate threads."""
     # Get script directory
@@ -112,9 +194,15 @@ def main():
     )
 
     try:
+        # Both threads bind and listen concurrently; wait until each accepts connections
         old_site_thread.start()
         new_site_thread.start()
 
+        for port in (8000, 8001):
+            if not wait_for_port(port):
+                print(f"Error: Server on port {port} did not start")
+                sys.exit(1)
+
         print()
         print("Both sites are running!")
         print()
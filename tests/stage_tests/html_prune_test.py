@@ -5,19 +5,37 @@ Tests matching of pages with identical HTML content via hash comparison.
 """
 
 import unittest
-import asyncio
 import os
 import sys
 from pathlib import Path
+from unittest.mock import patch
 
 # Add project root to Python path
 parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
 sys.path.insert(0, parent_dir)
 
+from src.redirx.config import Config
+from src.redirx.lib import Pipeline
 from src.redirx.stages import HtmlPruneStage, WebPage, Mapping
 
 
-class TestHtmlPruneStage(unittest.TestCase):
+# WebPage hashes its HTML on construction, so the large fixture is built once
+# at import rather than in every test that uses it.
+MANY_OLD_PAGES = [
+    WebPage(f'http://old.com/page{i}.html', f'<html><body>Old Content {i}</body></html>')
+    for i in range(100)
+]
+# Every 10th page has matching HTML
+MANY_NEW_PAGES = [
+    WebPage(
+        f'http://new.com/page{i}.html',
+        f'<html><body>Old Content {i}</body></html>' if i % 10 == 0 else f'<html><body>New Content {i}</body></html>'
+    )
+    for i in range(100)
+]
+
+
+class TestHtmlPruneStage(unittest.IsolatedAsyncioTestCase):
     """Tests for HtmlPruneStage HTML matching logic."""
 
     def setUp(self):
@@ -234,26 +252,84 @@ class TestHtmlPruneStage(unittest.TestCase):
 
     async def test_execute_with_many_pages(self):
         """Test execute with large number of pages (hash lookup performance)."""
-        # Create 100 old pages and 100 new pages, with 10 matches
-        old_pages = []
-        new_pages = []
-
-        for i in range(100):
-            old_html = f'<html><body>Old Content {i}</body></html>'
-            old_pages.append(WebPage(f'http://old.com/page{i}.html', old_html))
-
-            # Every 10th page has matching HTML
-            if i % 10 == 0:
-                new_pages.append(WebPage(f'http://new.com/page{i}.html', old_html))
-            else:
-                new_html = f'<html><body>New Content {i}</body></html>'
-                new_pages.append(WebPage(f'http://new.com/page{i}.html', new_html))
+        # 100 old pages and 100 new pages, with 10 matches
+        old_pages = list(MANY_OLD_PAGES)
+        new_pages = list(MANY_NEW_PAGES)
 
         result_old, result_new, mappings = await self.stage.execute((old_pages, new_pages))
 
         # Should find 10 matches
         self.assertEqual(len(mappings), 10)
 
+    # ========================================================================
+    # Execute Tests - Near-Duplicate Matching
+    # ========================================================================
+
+    async def test_execute_near_duplicates_matched_when_enabled(self):
+        """Test that near-identical HTML is matched when near_dup_threshold is set."""
+        body = ' '.join(f'word{i}' for i in range(300))
+        old_pages = [
+            WebPage('http://old.com/page.html', f'<html><body><p>{body}</p><footer>Updated 2023-01-01</footer></body></html>')
+        ]
+        new_pages = [
+            WebPage('http://new.com/page.html', f'<html>\n<body>\n<p>{body}</p><footer>Updated 2024-06-30</footer></body></html>')
+        ]
+
+        stage = HtmlPruneStage(near_dup_threshold=0.8)
+        result_old, result_new, mappings = await stage.execute((old_pages, new_pages))
+
+        self.assertEqual(len(mappings), 1)
+        mapping = list(mappings)[0]
+        self.assertEqual(mapping.match_type, 'near_html')
+        self.assertEqual(mapping.new_page.url, 'http://new.com/page.html')
+        self.assertGreaterEqual(mapping.confidence_score, 0.8)
+
+        # Disabled by default
+        result_old, result_new, mappings = await self.stage.execute((old_pages, new_pages))
+        self.assertEqual(len(mappings), 0)
+
+    async def test_execute_near_duplicates_rejects_dissimilar_pages(self):
+        """Test that unrelated pages are not matched by the near-duplicate pass."""
+        old_pages = [
+            WebPage('http://old.com/a.html', '<html><body>' + ' '.join(f'alpha{i}' for i in range(100)) + '</body></html>')
+        ]
+        new_pages = [
+            WebPage('http://new.com/b.html', '<html><body>' + ' '.join(f'beta{i}' for i in range(100)) + '</body></html>')
+        ]
+
+        stage = HtmlPruneStage(near_dup_threshold=0.8)
+        result_old, result_new, mappings = await stage.execute((old_pages, new_pages))
+
+        self.assertEqual(len(mappings), 0)
+
+    def test_default_pipeline_reads_near_dup_threshold_from_config(self):
+        """Test that the default pipeline enables near-duplicate matching only when configured."""
+        def html_prune_stage():
+            return next(
+                stage for stage in Pipeline.default_pipeline()
+                if isinstance(stage, HtmlPruneStage)
+            )
+
+        with patch('src.redirx.stages.WebPageEmbeddingDB'), \
+             patch('src.redirx.stages.MigrationSessionDB'), \
+             patch('src.redirx.stages.URLMappingDB'):
+            with patch.object(Config, 'HTML_NEAR_DUP_THRESHOLD', None):
+                self.assertIsNone(html_prune_stage().near_dup_threshold)
+            with patch.object(Config, 'HTML_NEAR_DUP_THRESHOLD', 0.9):
+                self.assertEqual(html_prune_stage().near_dup_threshold, 0.9)
+
+    def test_exact_match_mappings_hash_distinctly(self):
+        """Test that exact-match mappings don't all share one hash bucket."""
+        mappings = [
+            Mapping(
+                WebPage(f'http://old.com/page{i}.html', f'<html><body>Page {i}</body></html>'),
+                WebPage(f'http://new.com/page{i}.html', f'<html><body>Page {i}</body></html>')
+            )
+            for i in range(10)
+        ]
+
+        self.assertEqual(len({hash(m) for m in mappings}), 10)
+
     # ========================================================================
     # WebPage Hash Tests
     # ========================================================================
@@ -291,21 +367,3 @@ class TestHtmlPruneStage(unittest.TestCase):
 
         # Should be same value
         self.assertEqual(hash1, hash2)
-
-
-# ============================================================================
-# Test Runner Helper
-# ============================================================================
-
-def async_test(coro):
-    """Decorator to run async test methods."""
-    def wrapper(*args, **kwargs):
-        return asyncio.run(coro(*args, **kwargs))
-    return wrapper
-
-
-# Apply async_test decorator to all async test methods
-for attr_name in dir(TestHtmlPruneStage):
-    attr = getattr(TestHtmlPruneStage, attr_name)
-    if asyncio.iscoroutinefunction(attr) and attr_name.startswith('test_'):
-        setattr(TestHtmlPruneStage, attr_name, async_test(attr))
\ No newline at end of file
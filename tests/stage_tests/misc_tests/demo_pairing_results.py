@@ -18,7 +18,10 @@ Requirements:
 
 import asyncio
 import os
+import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 from pathlib import Path
 from typing import List, Dict
 from uuid import uuid4
@@ -31,6 +34,19 @@ from src.redirx.database import MigrationSessionDB, URLMappingDB
 from src.redirx.config import Config
 
 
+# Numbered data row of the SITE_MAPPING.md table:
+# | # | Old URL | New URL | Match Type | Similarity | Stage | Notes |
+MAPPING_ROW_RE = re.compile(
+    r'^\|\s*\d+\s*'
+    r'\|\s*(?P<old_url>[^|]*?)\s*'
+    r'\|\s*(?P<new_url>[^|]*?)\s*'
+    r'\|\s*(?P<match_type>[^|]*?)\s*'
+    r'\|\s*(?P<similarity>[^|]*?)\s*'
+    r'\|\s*(?P<stage>[^|]*?)\s*\|',
+    re.MULTILINE
+)
+
+
 def load_mock_site_pages(site_dir: str) -> List[WebPage]:
     """
     Load all HTML files from a mock site directory.
@@ -41,30 +57,39 @@ def load_mock_site_pages(site_dir: str) -> List[WebPage]:
     Returns:
         List of WebPage objects with proper URLs
     """
-    site_path = Path(site_dir)
-    pages = []
-
     # Determine base URL based on site type
     if 'old_site' in site_dir:
         base_url = 'http://localhost:8000'
     else:
         base_url = 'http://localhost:8001'
 
-    # Find all HTML files
-    html_files = sorted(site_path.rglob('*.html'))
+    # Find all HTML files (os.walk is scandir-backed and skips rglob's
+    # per-entry Path objects)
+    html_files = sorted(
+        os.path.join(dirpath, filename)
+        for dirpath, _, filenames in os.walk(site_dir)
+        for filename in filenames
+        if filename.endswith('.html')
+    )
 
-    for html_file in html_files:
-        # Create relative URL path
-        rel_path = html_file.relative_to(site_path)
-        url = f"{base_url}/{rel_path}"
+    # Reads are independent and I/O bound, so fetch them concurrently.
+    # Raw bytes decoded in one call: skips the text-mode newline translation
+    # pass and keeps the HTML byte-identical to what the mock HTTP servers
+    # (and therefore the scraper) would return
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        htmls = list(executor.map(read_utf8, html_files))
 
-        # Read HTML content
-        with open(html_file, 'r', encoding='utf-8') as f:
-            html = f.read()
+    # Create relative URL paths
+    return [
+        WebPage(f"{base_url}/{os.path.relpath(html_file, site_dir).replace(os.sep, '/')}", html)
+        for html_file, html in zip(html_files, htmls)
+    ]
 
-        pages.append(WebPage(url, html))
 
-    return pages
+def read_utf8(path: str) -> str:
+    """Read a file as raw bytes and decode it as UTF-8."""
+    with open(path, 'rb') as f:
+        return f.read().decode('utf-8')
 
 
 def load_expected_mappings() -> Dict[str, Dict]:
@@ -79,38 +104,54 @@ def load_expected_mappings() -> Dict[str, Dict]:
     if not mapping_file.exists():
         return {}
 
-    expected = {}
-
-    with open(mapping_file, 'r') as f:
-        lines = f.readlines()
-
-    # Parse the markdown table
-    in_table = False
-    for line in lines:
-        if line.startswith('| # |'):
-            in_table = True
-            continue
-        if in_table and line.startswith('|---'):
-            continue
-        if in_table and line.startswith('|'):
-            parts = [p.strip() for p in line.split('|')]
-            if len(parts) >= 7 and parts[1].isdigit():
-                old_url = parts[2]
-                new_url = parts[3]
-                match_type = parts[4]
-                similarity = parts[5]
-                stage = parts[6]
-
-                # Skip orphaned and new pages
-                if new_url != '-' and old_url != '-':
-                    expected[old_url] = {
-                        'new_url': new_url,
-                        'match_type': match_type,
-                        'similarity': similarity,
-                        'stage': stage
-                    }
-
-    return expected
+    # Skip orphaned and new pages
+    return {
+        match.group('old_url'): {
+            'new_url': match.group('new_url'),
+            'match_type': match.group('match_type'),
+            'similarity': match.group('similarity'),
+            'stage': match.group('stage')
+        }
+        for match in MAPPING_ROW_RE.finditer(mapping_file.read_text())
+        if match.group('new_url') != '-' and match.group('old_url') != '-'
+    }
+
+
+def print_mapping_tier(
+    title: str,
+    description: str,
+    tier: List[Dict],
+    expected_mappings: Dict[str, Dict]
+) -> None:
+    """
+    Print one confidence tier of mappings, flagging each against SITE_MAPPING.md.
+
+    Args:
+        title: Tier heading.
+        description: One-line explanation of the tier's score range.
+        tier: Mappings in the tier, with 'old_path'/'new_path' already set.
+        expected_mappings: Expected mappings keyed by old site-relative path.
+    """
+    print(title)
+    print(f"   {description}")
+    print("-" * 80)
+    for mapping in tier:
+        old_path = mapping['old_path']
+        new_path = mapping['new_path']
+        score = mapping['confidence_score']
+        needs_review = "⚠️  REVIEW" if mapping['needs_review'] else "✓"
+
+        # Check against expected
+        expected_match = ""
+        expected = expected_mappings.get(old_path)
+        if expected is not None:
+            if expected['new_url'] == new_path:
+                expected_match = " ✅ MATCHES EXPECTED"
+            else:
+                expected_match = f" ⚠️  EXPECTED: {expected['new_url']}"
+
+        print(f"   {score:.3f}  {old_path[1:]:45} → {new_path[1:]:45} {needs_review}{expected_match}")
+    print()
 
 
 async def run_demo():
@@ -185,89 +226,57 @@ async def run_demo():
         print()
 
         # Sort mappings by confidence score (descending)
-        mappings.sort(key=lambda m: m['confidence_score'], reverse=True)
-
-        # Group by confidence level
-        high_confidence = [m for m in mappings if m['confidence_score'] >= 0.9]
-        medium_confidence = [m for m in mappings if 0.8 <= m['confidence_score'] < 0.9]
-        low_confidence = [m for m in mappings if 0.6 <= m['confidence_score'] < 0.8]
-
-        # Display high confidence matches
+        mappings.sort(key=itemgetter('confidence_score'), reverse=True)
+
+        # Group by confidence level, collect matched URLs and score against the
+        # expected mappings in a single pass
+        high_confidence, medium_confidence, low_confidence = [], [], []
+        old_urls, new_urls = set(), set()
+        needs_review_count = 0
+        correct_matches = incorrect_matches = 0
+        for m in mappings:
+            score = m['confidence_score']
+            if score >= 0.9:
+                high_confidence.append(m)
+            elif score >= 0.8:
+                medium_confidence.append(m)
+            elif score >= 0.6:
+                low_confidence.append(m)
+            old_urls.add(m['old_url'])
+            new_urls.add(m['new_url'])
+            # Site-relative paths ('/about.html'), the key space of SITE_MAPPING.md
+            m['old_path'] = m['old_url'].removeprefix('http://localhost:8000')
+            m['new_path'] = m['new_url'].removeprefix('http://localhost:8001')
+            # Join against SITE_MAPPING.md while we're here
+            expected = expected_mappings.get(m['old_path'])
+            if expected is not None:
+                if expected['new_url'] == m['new_path']:
+                    correct_matches += 1
+                else:
+                    incorrect_matches += 1
+            needs_review_count += m['needs_review']
+
+        # Display matches by confidence tier
         if high_confidence:
-            print(f"🟢 HIGH CONFIDENCE MATCHES ({len(high_confidence)})")
-            print("   Score ≥ 0.9 - Highly likely to be correct")
-            print("-" * 80)
-            for mapping in high_confidence:
-                old_url = mapping['old_url'].replace('http://localhost:8000/', '')
-                new_url = mapping['new_url'].replace('http://localhost:8001/', '')
-                score = mapping['confidence_score']
-                needs_review = "⚠️  REVIEW" if mapping['needs_review'] else "✓"
-
-                # Check against expected
-                expected_match = ""
-                expected_key = f"/{old_url}"
-                if expected_key in expected_mappings:
-                    expected_new = expected_mappings[expected_key]['new_url']
-                    if expected_new == f"/{new_url}":
-                        expected_match = " ✅ MATCHES EXPECTED"
-                    else:
-                        expected_match = f" ⚠️  EXPECTED: {expected_new}"
-
-                print(f"   {score:.3f}  {old_url:45} → {new_url:45} {needs_review}{expected_match}")
-            print()
-
-        # Display medium confidence matches
+            print_mapping_tier(
+                f"🟢 HIGH CONFIDENCE MATCHES ({len(high_confidence)})",
+                "Score ≥ 0.9 - Highly likely to be correct",
+                high_confidence, expected_mappings
+            )
         if medium_confidence:
-            print(f"🟡 MEDIUM CONFIDENCE MATCHES ({len(medium_confidence)})")
-            print("   Score 0.8-0.9 - Likely correct, may need review if ambiguous")
-            print("-" * 80)
-            for mapping in medium_confidence:
-                old_url = mapping['old_url'].replace('http://localhost:8000/', '')
-                new_url = mapping['new_url'].replace('http://localhost:8001/', '')
-                score = mapping['confidence_score']
-                needs_review = "⚠️  REVIEW" if mapping['needs_review'] else "✓"
-
-                # Check against expected
-                expected_match = ""
-                expected_key = f"/{old_url}"
-                if expected_key in expected_mappings:
-                    expected_new = expected_mappings[expected_key]['new_url']
-                    if expected_new == f"/{new_url}":
-                        expected_match = " ✅ MATCHES EXPECTED"
-                    else:
-                        expected_match = f" ⚠️  EXPECTED: {expected_new}"
-
-                print(f"   {score:.3f}  {old_url:45} → {new_url:45} {needs_review}{expected_match}")
-            print()
-
-        # Display low confidence matches
+            print_mapping_tier(
+                f"🟡 MEDIUM CONFIDENCE MATCHES ({len(medium_confidence)})",
+                "Score 0.8-0.9 - Likely correct, may need review if ambiguous",
+                medium_confidence, expected_mappings
+            )
         if low_confidence:
-            print(f"🟠 LOW CONFIDENCE MATCHES ({len(low_confidence)})")
-            print("   Score 0.6-0.8 - May be correct, should review")
-            print("-" * 80)
-            for mapping in low_confidence:
-                old_url = mapping['old_url'].replace('http://localhost:8000/', '')
-                new_url = mapping['new_url'].replace('http://localhost:8001/', '')
-                score = mapping['confidence_score']
-                needs_review = "⚠️  REVIEW" if mapping['needs_review'] else "✓"
-
-                # Check against expected
-                expected_match = ""
-                expected_key = f"/{old_url}"
-                if expected_key in expected_mappings:
-                    expected_new = expected_mappings[expected_key]['new_url']
-                    if expected_new == f"/{new_url}":
-                        expected_match = " ✅ MATCHES EXPECTED"
-                    else:
-                        expected_match = f" ⚠️  EXPECTED: {expected_new}"
-
-                print(f"   {score:.3f}  {old_url:45} → {new_url:45} {needs_review}{expected_match}")
-            print()
+            print_mapping_tier(
+                f"🟠 LOW CONFIDENCE MATCHES ({len(low_confidence)})",
+                "Score 0.6-0.8 - May be correct, should review",
+                low_confidence, expected_mappings
+            )
 
         # Find orphaned and new pages
-        old_urls = {m['old_url'] for m in mappings}
-        new_urls = {m['new_url'] for m in mappings}
-
         orphaned_pages = [p for p in old_pages if p.url not in old_urls]
         new_only_pages = [p for p in new_pages if p.url not in new_urls]
 
@@ -277,7 +286,7 @@ async def run_demo():
             print("   Old pages with no suitable match (similarity < 0.6)")
             print("-" * 80)
             for page in orphaned_pages:
-                url = page.url.replace('http://localhost:8000/', '')
+                url = page.url.removeprefix('http://localhost:8000/')
                 print(f"   {url}")
             print()
 
@@ -287,7 +296,7 @@ async def run_demo():
             print("   New pages with no old equivalent")
             print("-" * 80)
             for page in new_only_pages:
-                url = page.url.replace('http://localhost:8001/', '')
+                url = page.url.removeprefix('http://localhost:8001/')
                 print(f"   {url}")
             print()
 
@@ -303,25 +312,11 @@ async def run_demo():
         print(f"  - Low confidence:        {len(low_confidence)}")
         print(f"Orphaned pages:            {len(orphaned_pages)}")
         print(f"New pages:                 {len(new_only_pages)}")
-        print(f"Needs review:              {len([m for m in mappings if m['needs_review']])}")
+        print(f"Needs review:              {needs_review_count}")
         print()
 
         # Accuracy check against expected mappings
         if expected_mappings:
-            correct_matches = 0
-            incorrect_matches = 0
-
-            for mapping in mappings:
-                old_url = mapping['old_url'].replace('http://localhost:8000', '')
-                new_url = mapping['new_url'].replace('http://localhost:8001', '')
-
-                if old_url in expected_mappings:
-                    expected_new = expected_mappings[old_url]['new_url']
-                    if expected_new == new_url:
-                        correct_matches += 1
-                    else:
-                        incorrect_matches += 1
-
             accuracy = (correct_matches / len(mappings) * 100) if mappings else 0
 
             print("VALIDATION AGAINST SITE_MAPPING.md")
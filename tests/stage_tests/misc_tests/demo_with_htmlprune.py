@@ -11,6 +11,7 @@ Usage:
 
 import asyncio
 import os
+import re
 import sys
 from pathlib import Path
 from typing import List, Dict
@@ -22,27 +23,35 @@ from src.redirx.stages import EmbedStage, PairingStage, HtmlPruneStage, WebPage
 from src.redirx.database import MigrationSessionDB, URLMappingDB
 from src.redirx.config import Config
 
+# Numbered data row of the SITE_MAPPING.md table:
+# | # | Old URL | New URL | Match Type | Similarity | Stage | Notes |
+MAPPING_ROW_RE = re.compile(
+    r'^\|\s*\d+\s*'
+    r'\|\s*(?P<old_url>[^|]*?)\s*'
+    r'\|\s*(?P<new_url>[^|]*?)\s*\|'
+    r'(?:[^|]*\|){3}',
+    re.MULTILINE
+)
 
-def load_mock_site_pages(site_dir: str) -> List[WebPage]:
-    """Load all HTML files from a mock site directory."""
-    site_path = Path(site_dir)
-    pages = []
+OLD_BASE_URL = 'http://localhost:8000'
+NEW_BASE_URL = 'http://localhost:8001'
+CONSULTING_OLD_URL = f'{OLD_BASE_URL}/services/consulting.html'
 
-    if 'old_site' in site_dir:
-        base_url = 'http://localhost:8000'
-    else:
-        base_url = 'http://localhost:8001'
 
-    for html_file in sorted(site_path.rglob('*.html')):
-        rel_path = html_file.relative_to(site_path)
-        url = f"{base_url}/{rel_path}"
+async def load_mock_site_pages(site_dir: str) -> List[WebPage]:
+    """Load all HTML files from a mock site directory, reading them concurrently."""
+    site_path = Path(site_dir)
 
-        with open(html_file, 'r', encoding='utf-8') as f:
-            html = f.read()
+    base_url = OLD_BASE_URL if 'old_site' in site_dir else NEW_BASE_URL
 
-        pages.append(WebPage(url, html))
+    def read_page(html_file: Path) -> WebPage:
+        rel_path = html_file.relative_to(site_path)
+        return WebPage(f"{base_url}/{rel_path}", html_file.read_text(encoding='utf-8'))
 
-    return pages
+    return list(await asyncio.gather(*(
+        asyncio.to_thread(read_page, html_file)
+        for html_file in sorted(site_path.rglob('*.html'))
+    )))
 
 
 async def run_demo():
@@ -61,10 +70,16 @@ async def run_demo():
         print(f"❌ Configuration Error: {e}")
         return
 
+    # One instance of each, shared by both scenarios
+    session_db = MigrationSessionDB()
+    mapping_db = URLMappingDB()
+
     # Load pages
     print("📂 Loading mock site pages...")
-    old_pages = load_mock_site_pages('tests/mock_sites/old_site')
-    new_pages = load_mock_site_pages('tests/mock_sites/new_site')
+    old_pages, new_pages = await asyncio.gather(
+        load_mock_site_pages('tests/mock_sites/old_site'),
+        load_mock_site_pages('tests/mock_sites/new_site')
+    )
     print(f"   Loaded {len(old_pages)} old site pages")
     print(f"   Loaded {len(new_pages)} new site pages")
     print()
@@ -78,7 +93,7 @@ async def run_demo():
     print("=" * 80)
     print()
 
-    session1 = MigrationSessionDB().create_session(user_id='demo_with_prune')
+    session1 = session_db.create_session(user_id='demo_with_prune')
 
     try:
         # Run HtmlPruneStage first
@@ -92,8 +107,8 @@ async def run_demo():
         if html_mappings:
             print("   Exact matches found:")
             for mapping in html_mappings:
-                old_url = mapping.old_page.url.replace('http://localhost:8000/', '')
-                new_url = mapping.new_page.url.replace('http://localhost:8001/', '')
+                old_url = mapping.old_page.url.replace(f'{OLD_BASE_URL}/', '')
+                new_url = mapping.new_page.url.replace(f'{NEW_BASE_URL}/', '')
                 print(f"      • {old_url:50} → {new_url}")
             print()
 
@@ -111,8 +126,8 @@ async def run_demo():
         print()
 
         # Get results
-        mapping_db = URLMappingDB()
         mappings1 = mapping_db.get_mappings_by_session(session_id=session1)
+        by_old_url1 = {m['old_url']: m for m in mappings1}
 
         html_match_count = len([m for m in mappings1 if m['match_type'] == 'exact_html'])
         semantic_match_count = len(mappings1) - html_match_count
@@ -123,14 +138,11 @@ async def run_demo():
         print()
 
         # Check the consulting.html match
-        consulting_match1 = next(
-            (m for m in mappings1 if 'services/consulting.html' in m['old_url']),
-            None
-        )
+        consulting_match1 = by_old_url1.get(CONSULTING_OLD_URL)
 
         if consulting_match1:
             print("✅ services/consulting.html result:")
-            new_url = consulting_match1['new_url'].replace('http://localhost:8001/', '')
+            new_url = consulting_match1['new_url'].replace(f'{NEW_BASE_URL}/', '')
             print(f"   → {new_url}")
             print(f"   Match type: {consulting_match1['match_type']}")
             print(f"   Confidence: {consulting_match1['confidence_score']:.3f}")
@@ -151,7 +163,7 @@ async def run_demo():
     print("=" * 80)
     print()
 
-    session2 = MigrationSessionDB().create_session(user_id='demo_without_prune')
+    session2 = session_db.create_session(user_id='demo_without_prune')
 
     try:
         print("⚠️  Skipping HtmlPruneStage - using semantic matching only")
@@ -172,6 +184,7 @@ async def run_demo():
 
         # Get results
         mappings2 = mapping_db.get_mappings_by_session(session_id=session2)
+        by_old_url2 = {m['old_url']: m for m in mappings2}
 
         print(f"📊 Results: {len(mappings2)} total matches")
         print(f"   • 0 exact HTML matches (stage skipped)")
@@ -179,14 +192,11 @@ async def run_demo():
         print()
 
         # Check the consulting.html match
-        consulting_match2 = next(
-            (m for m in mappings2 if 'services/consulting.html' in m['old_url']),
-            None
-        )
+        consulting_match2 = by_old_url2.get(CONSULTING_OLD_URL)
 
         if consulting_match2:
             print("⚠️  services/consulting.html result:")
-            new_url = consulting_match2['new_url'].replace('http://localhost:8001/', '')
+            new_url = consulting_match2['new_url'].replace(f'{NEW_BASE_URL}/', '')
             print(f"   → {new_url}")
             print(f"   Match type: {consulting_match2['match_type']}")
             print(f"   Confidence: {consulting_match2['confidence_score']:.3f}")
@@ -214,45 +224,27 @@ async def run_demo():
     print("=" * 80)
     print()
 
-    # Calculate accuracy for both scenarios
-    from pathlib import Path
+    # Calculate accuracy for both scenarios, keyed by full old URL like the
+    # by_old_url indexes
     expected_file = Path('tests/mock_sites/SITE_MAPPING.md')
     expected_mappings = {}
 
     if expected_file.exists():
-        with open(expected_file, 'r') as f:
-            lines = f.readlines()
-
-        in_table = False
-        for line in lines:
-            if line.startswith('| # |'):
-                in_table = True
-                continue
-            if in_table and line.startswith('|---'):
-                continue
-            if in_table and line.startswith('|'):
-                parts = [p.strip() for p in line.split('|')]
-                if len(parts) >= 7 and parts[1].isdigit():
-                    old_url = parts[2]
-                    new_url = parts[3]
-                    if new_url != '-' and old_url != '-':
-                        expected_mappings[old_url] = new_url
-
-    def calculate_accuracy(mappings):
-        correct = 0
-        incorrect = 0
-        for m in mappings:
-            old = m['old_url'].replace('http://localhost:8000', '')
-            new = m['new_url'].replace('http://localhost:8001', '')
-            if old in expected_mappings:
-                if expected_mappings[old] == new:
-                    correct += 1
-                else:
-                    incorrect += 1
+        expected_mappings = {
+            OLD_BASE_URL + match.group('old_url'): NEW_BASE_URL + match.group('new_url')
+            for match in MAPPING_ROW_RE.finditer(expected_file.read_text())
+            if match.group('new_url') != '-' and match.group('old_url') != '-'
+        }
+
+    def calculate_accuracy(by_old_url):
+        actual = {old_url: m['new_url'] for old_url, m in by_old_url.items()}
+        # Set operations on the dict views compare every pair at C level
+        correct = len(actual.items() & expected_mappings.items())
+        incorrect = len(actual.keys() & expected_mappings.keys()) - correct
         return correct, incorrect
 
-    correct1, incorrect1 = calculate_accuracy(mappings1)
-    correct2, incorrect2 = calculate_accuracy(mappings2)
+    correct1, incorrect1 = calculate_accuracy(by_old_url1)
+    correct2, incorrect2 = calculate_accuracy(by_old_url2)
 
     print(f"{'Metric':<35} {'WITH HtmlPrune':>20} {'WITHOUT HtmlPrune':>20}")
     print("-" * 80)
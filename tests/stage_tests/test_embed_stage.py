@@ -1,9 +1,14 @@
 import unittest
 import asyncio
+import base64
+import hashlib
 import os
 import sys
+import threading
 from unittest.mock import AsyncMock, MagicMock, patch
+import httpx
 import numpy as np
+from openai import BadRequestError, RateLimitError
 from uuid import uuid4
 
 # Add project root to Python path
@@ -15,7 +20,26 @@ from src.redirx.config import Config
 from src.redirx.database import WebPageEmbeddingDB, MigrationSessionDB
 
 
-class TestEmbedStage(unittest.TestCase):
+def make_embedding_response(count: int, values: list = None) -> MagicMock:
+    """
+    Build a mock embeddings response with one 1536-dim vector per input,
+    base64-encoded float32 as the API returns for encoding_format="base64".
+    """
+    values = values if values is not None else [0.1] * count
+    mock_response = MagicMock()
+    mock_response.data = [
+        MagicMock(embedding=base64.b64encode(np.full(1536, value, dtype=np.float32).tobytes()).decode())
+        for value in values
+    ]
+    return mock_response
+
+
+def stored_records(mock_insert: MagicMock) -> list:
+    """Records passed to every call of a mocked insert_embeddings, in order."""
+    return [record for c in mock_insert.call_args_list for record in c[1]['records']]
+
+
+class TestEmbedStage(unittest.IsolatedAsyncioTestCase):
     """Integration tests for EmbedStage."""
 
     def setUp(self):
@@ -30,6 +54,14 @@ class TestEmbedStage(unittest.TestCase):
         ]
         self.mappings = set()
 
+        # Cross-session cache is covered by its own tests below
+        cache_patch = patch('src.redirx.stages.Config.EMBEDDING_CACHE_ENABLED', False)
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+
+        # No embeddings cached in-process by earlier tests
+        EmbedStage._vector_cache.clear()
+
     def test_init_with_session_id(self):
         """Test initialization with provided session ID."""
         session_id = uuid4()
@@ -134,22 +166,380 @@ class TestEmbedStage(unittest.TestCase):
 
     @patch('src.redirx.stages.Config.validate_embeddings')
     @patch('src.redirx.stages.AsyncOpenAI')
-    @patch.object(EmbedStage, '_generate_and_store_embedding')
-    async def test_process_batch_concurrent_execution(self, mock_generate, mock_openai, mock_validate):
-        """Test that batches are processed concurrently."""
-        # Setup
+    @patch.object(EmbedStage, '_process_pages')
+    async def test_execute_skips_already_matched_pages(self, mock_process, mock_openai, mock_validate):
+        """Test that pages mapped by earlier stages are not embedded."""
+        mock_openai.return_value = AsyncMock()
+        mock_process.return_value = None
+        old_pages = [
+            WebPage(page.url, page.html + '<!--' + 'x' * 100 + '-->') for page in self.old_pages
+        ]
+        new_pages = [
+            WebPage(page.url, page.html + '<!--' + 'x' * 100 + '-->') for page in self.new_pages
+        ]
+        mappings = {Mapping(old_pages[0], new_pages[1], 1.0, 'exact_html', False)}
+
+        stage = EmbedStage(session_id=uuid4())
+        await stage.execute((old_pages, new_pages, mappings))
+
+        calls = mock_process.call_args_list
+        self.assertEqual(calls[0][0], ([old_pages[1]], 'old'))
+        self.assertEqual(calls[1][0], ([new_pages[0]], 'new'))
+
+    @patch('src.redirx.stages.Config.validate_embeddings')
+    @patch('src.redirx.stages.AsyncOpenAI')
+    @patch.object(EmbedStage, '_process_pages')
+    async def test_execute_checks_matched_urls_per_site(self, mock_process, mock_openai, mock_validate):
+        """Test that an old page's match doesn't skip a new page at the same URL."""
+        mock_openai.return_value = AsyncMock()
+        mock_process.return_value = None
+        html = '<html><body>' + 'x' * 100 + '</body></html>'
+        old_about = WebPage('http://site.com/about', html + 'old about')
+        new_about = WebPage('http://site.com/about-us', html + 'new about')
+        new_reused = WebPage('http://site.com/about', html + 'new page at old about URL')
+        mappings = {Mapping(old_about, new_about, 1.0, 'exact_html', False)}
+
+        stage = EmbedStage(session_id=uuid4())
+        await stage.execute(([old_about], [new_about, new_reused], mappings))
+
+        mock_process.assert_called_once()
+        self.assertEqual(mock_process.call_args[0], ([new_reused], 'new'))
+
+    @patch('src.redirx.stages.Config.validate_embeddings')
+    @patch('src.redirx.stages.AsyncOpenAI')
+    @patch.object(EmbedStage, '_process_pages')
+    async def test_execute_closes_openai_client_on_failure(self, mock_process, mock_openai, mock_validate):
+        """Test that each run closes the client it opened, even when embedding fails."""
         mock_client = AsyncMock()
         mock_openai.return_value = mock_client
-        mock_generate.return_value = None
+        mock_process.side_effect = RuntimeError("boom")
+
+        # Long enough to pass the scrape-failure filter, so embedding is attempted
+        old_pages = [
+            WebPage(page.url, page.html + '<!--' + 'x' * 100 + '-->') for page in self.old_pages
+        ]
+
+        stage = EmbedStage(session_id=uuid4())
+        with self.assertRaises(RuntimeError):
+            await stage.execute((old_pages, [], set()))
+
+        mock_client.close.assert_awaited_once()
+
+    @patch('src.redirx.stages.WebPageEmbeddingDB.insert_embeddings')
+    @patch.object(EmbedStage, '_generate_embeddings_batch')
+    async def test_process_pages_single_batch(self, mock_generate, mock_insert):
+        """Test that pages within one batch are embedded by a single batched call."""
+        mock_generate.return_value = np.full((len(self.old_pages), 1536), 0.1, dtype=np.float32)
 
         stage = EmbedStage(session_id=uuid4())
+
+        await stage._process_pages(self.old_pages, 'old')
+
+        # One request and one insert for the whole batch, one stored row per page
+        mock_generate.assert_called_once()
+        self.assertEqual(len(mock_generate.call_args[0][0]), len(self.old_pages))
+        mock_insert.assert_called_once()
+        self.assertEqual(mock_insert.call_args[1]['site_type'], 'old')
+        self.assertEqual(
+            [r['url'] for r in stored_records(mock_insert)],
+            [page.url for page in self.old_pages]
+        )
+
+    @patch('src.redirx.stages.WebPageEmbeddingDB.insert_embeddings')
+    async def test_process_pages_skips_pages_that_fail_to_embed(self, mock_insert):
+        """Test that a page whose request fails is skipped without losing the others."""
+        stage = EmbedStage(session_id=uuid4())
+        stage.BATCH_SIZE = 1  # One request per page, so one page can fail alone
+        failing_text = self.old_pages[1].extract_text()
+
+        async def fake_create(input, model, **kwargs):
+            if input == [failing_text]:
+                raise ValueError("API down")
+            return make_embedding_response(len(input))
+
+        mock_client = AsyncMock()
+        mock_client.embeddings.create = fake_create
         stage.openai_client = mock_client
 
-        # Execute batch processing
-        await stage._process_batch(self.old_pages, 'old')
+        with patch('src.redirx.stages.asyncio.sleep', new=AsyncMock()):
+            await stage._process_pages(self.old_pages, 'old')
 
-        # Verify all pages were processed
-        self.assertEqual(mock_generate.call_count, len(self.old_pages))
+        stored_urls = [
+            record['url']
+            for call in mock_insert.call_args_list
+            for record in call[1]['records']
+        ]
+        expected = [page.url for i, page in enumerate(self.old_pages) if i != 1]
+        self.assertEqual(stored_urls, expected)
+
+    @patch('src.redirx.stages.WebPageEmbeddingDB.insert_embeddings')
+    async def test_process_pages_overlaps_requests(self, mock_insert):
+        """Test that embedding requests are in flight concurrently, not awaited serially."""
+        stage = EmbedStage(session_id=uuid4())
+        stage.BATCH_SIZE = 1  # One request per page
+        pages = self.old_pages + self.new_pages
+
+        entered = []
+        all_entered = asyncio.Event()
+
+        async def fake_create(input, model, **kwargs):
+            entered.append(input)
+            if len(entered) == len(pages):
+                all_entered.set()
+            # Released only once every request has started; serial awaits time out here
+            await asyncio.wait_for(all_entered.wait(), timeout=1)
+            return make_embedding_response(len(input))
+
+        mock_client = AsyncMock()
+        mock_client.embeddings.create = fake_create
+        stage.openai_client = mock_client
+
+        await stage._process_pages(pages, 'old')
+
+        self.assertEqual(len(entered), len(pages))
+        self.assertEqual(len(stored_records(mock_insert)), len(pages))
+
+    @patch('src.redirx.stages.WebPageEmbeddingDB.insert_embeddings')
+    async def test_process_pages_reuses_embeddings_for_identical_text(self, mock_insert):
+        """Test that pages with identical text share a single embedding request."""
+        stage = EmbedStage(session_id=uuid4())
+        html = '<html><body><h1>Same</h1><p>Shared content</p></body></html>'
+        pages = [
+            WebPage('http://old.com/a', html),
+            WebPage('http://old.com/b', html),
+            WebPage('http://old.com/c', '<html><body><h1>Other</h1></body></html>'),
+        ]
+
+        mock_client = AsyncMock()
+        mock_client.embeddings.create = AsyncMock(
+            side_effect=lambda input, **kwargs: make_embedding_response(len(input))
+        )
+        stage.openai_client = mock_client
+
+        await stage._process_pages(pages, 'old')
+
+        # Both copies are stored, but only two distinct texts are sent to the API
+        self.assertEqual(len(stored_records(mock_insert)), 3)
+        mock_client.embeddings.create.assert_called_once()
+        self.assertEqual(len(mock_client.embeddings.create.call_args[1]['input']), 2)
+
+    @patch('src.redirx.stages.WebPageEmbeddingDB.insert_embeddings')
+    async def test_process_pages_batches_requests(self, mock_insert):
+        """Test that pages are embedded BATCH_SIZE texts per request, in order."""
+        stage = EmbedStage(session_id=uuid4())
+        stage.BATCH_SIZE = 3
+        pages = [
+            WebPage(f'http://old.com/page{i}', f'<html><body><h1>Page {i}</h1></body></html>')
+            for i in range(7)
+        ]
+
+        def fake_create(input, model, **kwargs):
+            # Encode each text's page number so results can be traced back
+            return make_embedding_response(
+                len(input), values=[float(text[-1]) for text in input]
+            )
+
+        mock_client = AsyncMock()
+        mock_client.embeddings.create = AsyncMock(side_effect=fake_create)
+        stage.openai_client = mock_client
+
+        await stage._process_pages(pages, 'old')
+
+        batch_sizes = [len(c[1]['input']) for c in mock_client.embeddings.create.call_args_list]
+        self.assertEqual(sorted(batch_sizes), [1, 3, 3])
+
+        # Every page is stored with its own embedding
+        stored = {r['url']: r['embedding'] for r in stored_records(mock_insert)}
+        self.assertEqual(len(stored), len(pages))
+        for i in range(7):
+            self.assertEqual(stored[f'http://old.com/page{i}'][0], i)
+
+    @patch('src.redirx.stages.WebPageEmbeddingDB.insert_embeddings')
+    async def test_process_pages_batches_by_text_length(self, mock_insert):
+        """Test that texts are grouped into batches by length, not input order."""
+        stage = EmbedStage(session_id=uuid4())
+        stage.BATCH_SIZE = 2
+        lengths = [40, 400, 60, 300]
+        pages = [
+            WebPage(f'http://old.com/page{i}', f'<html><body><p>{"x" * (n - 1)}{i}</p></body></html>')
+            for i, n in enumerate(lengths)
+        ]
+
+        mock_client = AsyncMock()
+        mock_client.embeddings.create = AsyncMock(
+            side_effect=lambda input, **kwargs: make_embedding_response(
+                len(input), values=[float(text[-1]) for text in input]
+            )
+        )
+        stage.openai_client = mock_client
+
+        await stage._process_pages(pages, 'old')
+
+        batches = sorted(
+            sorted(len(text) for text in c[1]['input'])
+            for c in mock_client.embeddings.create.call_args_list
+        )
+        self.assertEqual(batches, [[40, 60], [300, 400]])
+
+        # Embeddings still map back to the right pages
+        stored = {r['url']: r['embedding'] for r in stored_records(mock_insert)}
+        for i in range(len(pages)):
+            self.assertEqual(stored[f'http://old.com/page{i}'][0], i)
+
+    @patch('src.redirx.stages.WebPageEmbeddingDB.insert_embeddings')
+    async def test_process_pages_overlaps_extraction_with_requests(self, mock_insert):
+        """Test that a chunk's requests go out while the next chunk is still being extracted."""
+        stage = EmbedStage(session_id=uuid4())
+        stage.BATCH_SIZE = 1
+        stage.EXTRACT_BATCHES = 1  # One page per extraction chunk
+        first_request_sent = asyncio.Event()
+        prepare_texts = EmbedStage._prepare_texts
+        extracted = []
+
+        async def slow_prepare(pages):
+            if extracted:
+                # Finishes only once the first chunk's request is in flight
+                await asyncio.wait_for(first_request_sent.wait(), timeout=1)
+            extracted.extend(pages)
+            return await prepare_texts(pages)
+
+        async def fake_create(input, model, **kwargs):
+            first_request_sent.set()
+            return make_embedding_response(len(input))
+
+        mock_client = AsyncMock()
+        mock_client.embeddings.create = fake_create
+        stage.openai_client = mock_client
+
+        with patch.object(EmbedStage, '_prepare_texts', side_effect=slow_prepare):
+            await stage._process_pages(self.old_pages, 'old')
+
+        self.assertEqual(extracted, self.old_pages)
+        self.assertEqual(len(stored_records(mock_insert)), len(self.old_pages))
+
+    @patch('src.redirx.stages.Config.EMBEDDING_CACHE_ENABLED', True)
+    @patch('src.redirx.stages.WebPageEmbeddingDB.put_by_content_hash')
+    @patch('src.redirx.stages.WebPageEmbeddingDB.get_by_content_hash')
+    @patch('src.redirx.stages.WebPageEmbeddingDB.insert_embeddings')
+    async def test_process_pages_uses_persistent_cache(self, mock_insert, mock_get, mock_put):
+        """Test that cached texts skip the API and fresh embeddings are written back."""
+        stage = EmbedStage(session_id=uuid4())
+        cached_text = self.old_pages[0].extract_text()
+        cached_key = hashlib.blake2b(cached_text.encode('utf-8'), digest_size=16).hexdigest()
+        mock_get.side_effect = lambda hashes, model: {
+            h: np.full(1536, 0.5, dtype=np.float32) for h in hashes if h == cached_key
+        }
+
+        mock_client = AsyncMock()
+        mock_client.embeddings.create = AsyncMock(
+            side_effect=lambda input, **kwargs: make_embedding_response(len(input))
+        )
+        stage.openai_client = mock_client
+
+        await stage._process_pages(self.old_pages, 'old')
+
+        # Only the uncached page goes to the API, and only its embedding is cached
+        self.assertEqual(mock_client.embeddings.create.call_args[1]['input'], [self.old_pages[1].extract_text()])
+        self.assertEqual(len(mock_put.call_args[0][0]), 1)
+        self.assertNotIn(cached_key, mock_put.call_args[0][0])
+
+        stored = {r['url']: r['embedding'] for r in stored_records(mock_insert)}
+        self.assertEqual(stored[self.old_pages[0].url][0], np.float32(0.5))
+        self.assertEqual(stored[self.old_pages[1].url][0], np.float32(0.1))
+
+    @patch('src.redirx.stages.Config.EMBEDDING_CACHE_ENABLED', True)
+    @patch('src.redirx.stages.WebPageEmbeddingDB.put_by_content_hash')
+    @patch('src.redirx.stages.WebPageEmbeddingDB.get_by_content_hash', return_value={})
+    @patch('src.redirx.stages.WebPageEmbeddingDB.insert_embeddings')
+    async def test_persistent_cache_calls_run_off_the_event_loop(self, mock_insert, mock_get, mock_put):
+        """Test that cache reads and one write per chunk happen in worker threads."""
+        stage = EmbedStage(session_id=uuid4())
+        stage.BATCH_SIZE = 1  # One request per page, but still one cache write
+        caller_threads = []
+        mock_get.side_effect = lambda hashes, model: caller_threads.append(threading.get_ident()) or {}
+        mock_put.side_effect = lambda embeddings, model: caller_threads.append(threading.get_ident())
+
+        mock_client = AsyncMock()
+        mock_client.embeddings.create = AsyncMock(
+            side_effect=lambda input, **kwargs: make_embedding_response(len(input))
+        )
+        stage.openai_client = mock_client
+
+        await stage._process_pages(self.old_pages, 'old')
+
+        self.assertEqual(mock_client.embeddings.create.call_count, len(self.old_pages))
+        mock_put.assert_called_once()
+        self.assertEqual(len(mock_put.call_args[0][0]), len(self.old_pages))
+        self.assertNotIn(threading.get_ident(), caller_threads)
+
+    @patch('src.redirx.stages.Config.EMBEDDING_CACHE_ENABLED', True)
+    @patch('src.redirx.stages.WebPageEmbeddingDB.put_by_content_hash')
+    @patch('src.redirx.stages.WebPageEmbeddingDB.get_by_content_hash', side_effect=Exception("DB down"))
+    @patch('src.redirx.stages.WebPageEmbeddingDB.insert_embeddings')
+    async def test_process_pages_survives_cache_failure(self, mock_insert, mock_get, mock_put):
+        """Test that an unreachable cache falls back to the API for every page."""
+        stage = EmbedStage(session_id=uuid4())
+
+        mock_client = AsyncMock()
+        mock_client.embeddings.create = AsyncMock(
+            side_effect=lambda input, **kwargs: make_embedding_response(len(input))
+        )
+        stage.openai_client = mock_client
+
+        await stage._process_pages(self.old_pages, 'old')
+
+        self.assertEqual(len(mock_client.embeddings.create.call_args[1]['input']), len(self.old_pages))
+        self.assertEqual(len(stored_records(mock_insert)), len(self.old_pages))
+
+    @patch('src.redirx.stages.Config.EMBEDDING_CACHE_ENABLED', True)
+    @patch('src.redirx.stages.WebPageEmbeddingDB.put_by_content_hash')
+    @patch('src.redirx.stages.WebPageEmbeddingDB.get_by_content_hash', return_value={})
+    @patch('src.redirx.stages.WebPageEmbeddingDB.insert_embeddings')
+    async def test_embedding_cache_reuse(self, mock_insert, mock_get, mock_put):
+        """Test that a later stage re-embedding identical pages makes no API calls."""
+        mock_client = AsyncMock()
+        mock_client.embeddings.create = AsyncMock(
+            side_effect=lambda input, **kwargs: make_embedding_response(len(input))
+        )
+
+        for _ in range(2):
+            stage = EmbedStage(session_id=uuid4())
+            stage.openai_client = mock_client
+            await stage._process_pages(self.old_pages, 'old')
+
+        # Only the first stage called the API or the database cache
+        self.assertEqual(mock_client.embeddings.create.call_count, 1)
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(len(stored_records(mock_insert)), 2 * len(self.old_pages))
+
+    @patch('src.redirx.stages.Config.EMBEDDING_CACHE_ENABLED', True)
+    @patch('src.redirx.stages.EmbedStage.VECTOR_CACHE_SIZE', 1)
+    @patch('src.redirx.stages.WebPageEmbeddingDB.put_by_content_hash')
+    @patch('src.redirx.stages.WebPageEmbeddingDB.get_by_content_hash', return_value={})
+    @patch('src.redirx.stages.WebPageEmbeddingDB.insert_embeddings')
+    async def test_embedding_cache_evicts_least_recently_used(self, mock_insert, mock_get, mock_put):
+        """Test that the in-process cache holds at most VECTOR_CACHE_SIZE embeddings."""
+        stage = EmbedStage(session_id=uuid4())
+        mock_client = AsyncMock()
+        mock_client.embeddings.create = AsyncMock(
+            side_effect=lambda input, **kwargs: make_embedding_response(len(input))
+        )
+        stage.openai_client = mock_client
+
+        await stage._process_pages(self.old_pages, 'old')
+
+        self.assertEqual(len(EmbedStage._vector_cache), 1)
+
+    async def test_generate_embeddings_batch_rejects_short_response(self):
+        """Test that a response missing embeddings for some inputs is an error."""
+        stage = EmbedStage(session_id=uuid4())
+
+        mock_client = AsyncMock()
+        mock_client.embeddings.create = AsyncMock(return_value=make_embedding_response(1))
+        stage.openai_client = mock_client
+
+        with self.assertRaises(ValueError):
+            await stage._generate_embeddings_batch(['a', 'b'], max_retries=1)
 
     @patch('src.redirx.stages.Config.EMBEDDING_MODEL', 'text-embedding-3-small')
     async def test_generate_embedding_with_retry_mock(self):
@@ -158,12 +548,8 @@ class TestEmbedStage(unittest.TestCase):
         stage = EmbedStage(session_id=uuid4())
 
         # Mock OpenAI client
-        mock_response = MagicMock()
-        mock_response.data = [MagicMock()]
-        mock_response.data[0].embedding = [0.1] * 1536
-
         mock_client = AsyncMock()
-        mock_client.embeddings.create = AsyncMock(return_value=mock_response)
+        mock_client.embeddings.create = AsyncMock(return_value=make_embedding_response(1))
         stage.openai_client = mock_client
 
         # Execute
@@ -173,25 +559,24 @@ class TestEmbedStage(unittest.TestCase):
         self.assertIsInstance(embedding, np.ndarray)
         self.assertEqual(embedding.shape, (1536,))
         self.assertEqual(embedding.dtype, np.float32)
+        np.testing.assert_array_equal(embedding, np.full(1536, 0.1, dtype=np.float32))
         mock_client.embeddings.create.assert_called_once()
+        self.assertEqual(mock_client.embeddings.create.call_args[1]['encoding_format'], 'base64')
 
+    @patch('src.redirx.stages.asyncio.sleep', new_callable=AsyncMock)
     @patch('src.redirx.stages.Config.EMBEDDING_MODEL', 'text-embedding-3-small')
-    async def test_generate_embedding_retry_logic(self):
+    async def test_generate_embedding_retry_logic(self, mock_sleep):
         """Test retry logic on API failures."""
         # Setup
         stage = EmbedStage(session_id=uuid4())
 
         # Mock OpenAI client to fail twice, then succeed
-        mock_response = MagicMock()
-        mock_response.data = [MagicMock()]
-        mock_response.data[0].embedding = [0.1] * 1536
-
         mock_client = AsyncMock()
         mock_client.embeddings.create = AsyncMock(
             side_effect=[
                 Exception("API Error 1"),
                 Exception("API Error 2"),
-                mock_response
+                make_embedding_response(1)
             ]
         )
         stage.openai_client = mock_client
@@ -203,8 +588,89 @@ class TestEmbedStage(unittest.TestCase):
         self.assertIsInstance(embedding, np.ndarray)
         self.assertEqual(mock_client.embeddings.create.call_count, 3)
 
+        # Exponential backoff with up to 0.25s of jitter between attempts
+        delays = [c[0][0] for c in mock_sleep.call_args_list]
+        self.assertEqual(len(delays), 2)
+        self.assertTrue(0.5 <= delays[0] <= 0.75)
+        self.assertTrue(1.0 <= delays[1] <= 1.25)
+
+    @patch('src.redirx.stages.asyncio.sleep', new_callable=AsyncMock)
+    @patch('src.redirx.stages.Config.EMBEDDING_MODEL', 'text-embedding-3-small')
+    async def test_generate_embedding_honors_retry_after(self, mock_sleep):
+        """Test that rate-limit retries wait for the server's Retry-After."""
+        stage = EmbedStage(session_id=uuid4())
+
+        response = httpx.Response(
+            429,
+            headers={'retry-after': '7'},
+            request=httpx.Request('POST', 'https://api.openai.com/v1/embeddings')
+        )
+        mock_client = AsyncMock()
+        mock_client.embeddings.create = AsyncMock(
+            side_effect=[
+                RateLimitError("Rate limited", response=response, body=None),
+                make_embedding_response(1)
+            ]
+        )
+        stage.openai_client = mock_client
+
+        await stage._generate_embedding_with_retry("Test text", max_retries=3)
+
+        mock_sleep.assert_awaited_once_with(7.0)
+
+    def test_request_batches_respect_token_budget(self):
+        """Test that batches close at BATCH_SIZE texts or MAX_BATCH_TOKENS, whichever comes first."""
+        stage = EmbedStage(session_id=uuid4())
+        stage.BATCH_SIZE = 3
+        stage.MAX_BATCH_TOKENS = 100
+        stage.CHARS_PER_TOKEN = 1
+
+        # Estimated tokens: 10, 10, 10, 10, 60, 60, 150
+        texts = ['a' * 9] * 4 + ['b' * 59] * 2 + ['c' * 149]
+        entries = [(i, text, None) for i, text in enumerate(texts)]
+
+        batches = stage._request_batches(entries)
+
+        self.assertEqual(
+            [[key for key, _, _ in batch] for batch in batches],
+            [[0, 1, 2], [3, 4], [5], [6]]
+        )
+
+    @patch('src.redirx.stages.asyncio.sleep', new_callable=AsyncMock)
     @patch('src.redirx.stages.Config.EMBEDDING_MODEL', 'text-embedding-3-small')
-    async def test_generate_embedding_exhausted_retries(self):
+    async def test_embed_texts_isolates_rejected_input(self, mock_sleep):
+        """Test that a 4xx for one input splits the batch instead of failing every text in it."""
+        stage = EmbedStage(session_id=uuid4())
+        texts = [f'page {i}' for i in range(7)] + ['rejected page']
+        request = httpx.Request('POST', 'https://api.openai.com/v1/embeddings')
+        requests = []
+
+        async def fake_create(input, model, **kwargs):
+            requests.append(list(input))
+            if 'rejected page' in input:
+                raise BadRequestError(
+                    "Invalid input", response=httpx.Response(400, request=request), body=None
+                )
+            return make_embedding_response(len(input))
+
+        mock_client = AsyncMock()
+        mock_client.embeddings.create = fake_create
+        stage.openai_client = mock_client
+
+        embeddings = await stage._embed_texts(texts)
+
+        self.assertIsInstance(embeddings[-1], BadRequestError)
+        for embedding in embeddings[:-1]:
+            self.assertIsInstance(embedding, np.ndarray)
+
+        # Halved down to the bad input (8 -> 4 -> 2 -> 1), never retried as-is
+        self.assertEqual(len(requests), 7)
+        self.assertEqual(requests.count(['rejected page']), 1)
+        mock_sleep.assert_not_awaited()
+
+    @patch('src.redirx.stages.asyncio.sleep', new_callable=AsyncMock)
+    @patch('src.redirx.stages.Config.EMBEDDING_MODEL', 'text-embedding-3-small')
+    async def test_generate_embedding_exhausted_retries(self, mock_sleep):
         """Test that exhausted retries raise exception."""
         # Setup
         stage = EmbedStage(session_id=uuid4())
@@ -238,20 +704,16 @@ class TestEmbedStage(unittest.TestCase):
         self.assertIsNotNone(page._extracted_text)
         self.assertIsNotNone(page._title)
 
+    async def test_prepare_texts_extracts_in_order_and_caches(self):
+        """Test that _prepare_texts returns texts in page order and memoizes text and title."""
+        pages = self.old_pages + self.new_pages
 
-# Helper to run async tests
-def async_test(coro):
-    """Decorator to run async test methods."""
-    def wrapper(*args, **kwargs):
-        return asyncio.run(coro(*args, **kwargs))
-    return wrapper
-
+        texts = await EmbedStage._prepare_texts(pages)
 
-# Apply async_test decorator to all async test methods
-for attr_name in dir(TestEmbedStage):
-    attr = getattr(TestEmbedStage, attr_name)
-    if asyncio.iscoroutinefunction(attr) and attr_name.startswith('test_'):
-        setattr(TestEmbedStage, attr_name, async_test(attr))
+        self.assertEqual(texts, [page.extract_text() for page in pages])
+        for page in pages:
+            self.assertIsNotNone(page._extracted_text)
+            self.assertIsNotNone(page._title)
 
 
 if __name__ == '__main__':
@@ -1,5 +1,4 @@
 import unittest
-import asyncio
 import os
 import sys
 from unittest.mock import MagicMock, patch
@@ -12,11 +11,57 @@ sys.path.insert(0, parent_dir)
 
 from src.redirx.stages import PairingStage, WebPage, Mapping
 from src.redirx.config import Config
+from src.redirx.database import URLMappingDB, WebPageEmbeddingDB
 
 
-class TestPairingStage(unittest.TestCase):
+def embeddings_with_similarities(*similarities, offset=0):
+    """
+    Build a unit query vector plus one unit vector per similarity, each with
+    exactly that cosine similarity to the query.
+
+    Only axes from `offset` onward are used, so sets built at offsets at least
+    len(similarities) + 1 apart are orthogonal to each other.
+
+    Returns:
+        (query, [candidate, ...]) as lists of floats, like stored embeddings.
+    """
+    query = np.zeros(1536)
+    query[offset] = 1.0
+    candidates = []
+    for i, similarity in enumerate(similarities):
+        candidate = np.zeros(1536)
+        candidate[offset] = similarity
+        candidate[offset + 1 + i] = np.sqrt(1.0 - similarity ** 2)
+        candidates.append(candidate.tolist())
+    return query.tolist(), candidates
+
+
+def candidates(*pages):
+    """Build PairingStage's candidate arrays from (url, similarity) pairs."""
+    return {
+        'urls': np.array([url for url, _ in pages], dtype=object),
+        'scores': np.array([score for _, score in pages], dtype=np.float64)
+    }
+
+
+def serve_embeddings(mock_get_embeddings, old, new):
+    """Serve embedding records from a mocked get_embeddings_by_session by site type."""
+    records = {'old': old, 'new': new}
+    mock_get_embeddings.side_effect = lambda session_id, site_type=None, columns='*': records[site_type]
+
+
+class TestPairingStage(unittest.IsolatedAsyncioTestCase):
     """Comprehensive tests for PairingStage."""
 
+    @classmethod
+    def setUpClass(cls):
+        """Build one stage for the whole class, without database clients."""
+        # Every database call is patched per test, so the stage never needs a
+        # real client; the init tests below build their own fresh stages
+        with patch.object(WebPageEmbeddingDB, '__init__', return_value=None), \
+             patch.object(URLMappingDB, '__init__', return_value=None):
+            cls.shared_stage = PairingStage()
+
     def setUp(self):
         """Set up test fixtures."""
         # Create test pages
@@ -31,6 +76,8 @@ class TestPairingStage(unittest.TestCase):
         self.new_page_new = WebPage('http://new.com/blog', '<html><body><h1>Blog</h1><p>New blog section</p></body></html>')
 
         self.session_id = uuid4()
+        self.stage = self.shared_stage
+        self.stage.session_id = self.session_id
 
     def test_init_with_session_id(self):
         """Test initialization with provided session ID."""
@@ -65,7 +112,7 @@ class TestPairingStage(unittest.TestCase):
     @patch('src.redirx.stages.WebPageEmbeddingDB.get_embeddings_by_session')
     async def test_execute_processes_existing_mappings(self, mock_get_embeddings, mock_insert):
         """Test that existing HTML mappings are stored in database."""
-        stage = PairingStage(session_id=self.session_id)
+        stage = self.stage
 
         # Create existing mapping from HtmlPruneStage
         existing_mapping = Mapping(
@@ -101,159 +148,65 @@ class TestPairingStage(unittest.TestCase):
         self.assertIn(existing_mapping, result[2])
 
     @patch('src.redirx.stages.URLMappingDB.insert_mapping')
-    @patch('src.redirx.stages.WebPageEmbeddingDB.find_similar_pages')
-    @patch('src.redirx.stages.WebPageEmbeddingDB.get_embeddings_by_session')
-    async def test_high_confidence_match(self, mock_get_embeddings, mock_find_similar, mock_insert):
-        """Test high confidence semantic match (score >= 0.9)."""
-        stage = PairingStage(session_id=self.session_id)
-
-        old_pages = [self.old_page_1]
-        new_pages = [self.new_page_1]
-        mappings = set()
-
-        # Mock embeddings
-        mock_get_embeddings.return_value = [{
-            'url': 'http://old.com/page1',
-            'embedding': [0.1] * 1536
-        }]
-
-        # Mock high similarity match
-        mock_find_similar.return_value = [{
-            'url': 'http://new.com/products',
-            'similarity': 0.95
-        }]
-
-        # Execute
-        result = await stage.execute((old_pages, new_pages, mappings))
-
-        # Verify mapping was created with correct attributes
-        mock_insert.assert_called_once()
-        call_kwargs = mock_insert.call_args[1]
-        self.assertEqual(call_kwargs['confidence_score'], 0.95)
-        self.assertEqual(call_kwargs['match_type'], 'semantic_high')
-        self.assertFalse(call_kwargs['needs_review'])
-
-        # Verify result contains the mapping
-        self.assertEqual(len(result[2]), 1)
-
-    @patch('src.redirx.stages.URLMappingDB.insert_mapping')
-    @patch('src.redirx.stages.WebPageEmbeddingDB.find_similar_pages')
     @patch('src.redirx.stages.WebPageEmbeddingDB.get_embeddings_by_session')
-    async def test_medium_confidence_match_no_ambiguity(self, mock_get_embeddings, mock_find_similar, mock_insert):
-        """Test medium confidence match without ambiguity (score 0.8-0.9, gap > 0.1)."""
-        stage = PairingStage(session_id=self.session_id)
-
-        old_pages = [self.old_page_1]
-        new_pages = [self.new_page_1, self.new_page_2]
-        mappings = set()
-
-        # Mock embeddings
-        mock_get_embeddings.return_value = [{
-            'url': 'http://old.com/page1',
-            'embedding': [0.1] * 1536
-        }]
-
-        # Mock medium similarity with clear winner (gap > 0.1)
-        mock_find_similar.return_value = [
-            {'url': 'http://new.com/products', 'similarity': 0.85},
-            {'url': 'http://new.com/services', 'similarity': 0.70}  # Gap of 0.15
-        ]
-
-        # Execute
-        result = await stage.execute((old_pages, new_pages, mappings))
-
-        # Verify mapping
-        call_kwargs = mock_insert.call_args[1]
-        self.assertEqual(call_kwargs['confidence_score'], 0.85)
-        self.assertEqual(call_kwargs['match_type'], 'semantic_medium')
-        self.assertFalse(call_kwargs['needs_review'])  # No ambiguity
-
-    @patch('src.redirx.stages.URLMappingDB.insert_mapping')
-    @patch('src.redirx.stages.WebPageEmbeddingDB.find_similar_pages')
-    @patch('src.redirx.stages.WebPageEmbeddingDB.get_embeddings_by_session')
-    async def test_medium_confidence_match_with_ambiguity(self, mock_get_embeddings, mock_find_similar, mock_insert):
-        """Test medium confidence match with ambiguity (top 2 scores within 0.1)."""
-        stage = PairingStage(session_id=self.session_id)
-
-        old_pages = [self.old_page_1]
-        new_pages = [self.new_page_1, self.new_page_2]
-        mappings = set()
-
-        # Mock embeddings
-        mock_get_embeddings.return_value = [{
-            'url': 'http://old.com/page1',
-            'embedding': [0.1] * 1536
-        }]
-
-        # Mock ambiguous similarity (gap < 0.1)
-        mock_find_similar.return_value = [
-            {'url': 'http://new.com/products', 'similarity': 0.85},
-            {'url': 'http://new.com/services', 'similarity': 0.82}  # Gap of 0.03
+    async def test_confidence_tiers(self, mock_get_embeddings, mock_insert):
+        """Test match type and review flag for each semantic confidence tier."""
+        stage = self.stage
+        new_urls = ['http://new.com/products', 'http://new.com/services']
+
+        # (case, candidate similarities, expected match_type, expected needs_review)
+        cases = [
+            ('high', [0.95], 'semantic_high', False),  # score >= 0.9
+            ('medium-clear', [0.85, 0.70], 'semantic_medium', False),  # gap of 0.15 > 0.1
+            ('medium-ambiguous', [0.85, 0.82], 'semantic_medium', True),  # gap of 0.03 < 0.1
+            ('low', [0.70], 'semantic_low', True),  # low always needs review
         ]
 
-        # Execute
-        result = await stage.execute((old_pages, new_pages, mappings))
-
-        # Verify mapping needs review due to ambiguity
-        call_kwargs = mock_insert.call_args[1]
-        self.assertEqual(call_kwargs['confidence_score'], 0.85)
-        self.assertEqual(call_kwargs['match_type'], 'semantic_medium')
-        self.assertTrue(call_kwargs['needs_review'])  # Ambiguous
-
-    @patch('src.redirx.stages.URLMappingDB.insert_mapping')
-    @patch('src.redirx.stages.WebPageEmbeddingDB.find_similar_pages')
-    @patch('src.redirx.stages.WebPageEmbeddingDB.get_embeddings_by_session')
-    async def test_low_confidence_match(self, mock_get_embeddings, mock_find_similar, mock_insert):
-        """Test low confidence match (score 0.6-0.8, always needs review)."""
-        stage = PairingStage(session_id=self.session_id)
-
-        old_pages = [self.old_page_1]
-        new_pages = [self.new_page_1]
-        mappings = set()
-
-        # Mock embeddings
-        mock_get_embeddings.return_value = [{
-            'url': 'http://old.com/page1',
-            'embedding': [0.1] * 1536
-        }]
-
-        # Mock low similarity
-        mock_find_similar.return_value = [{
-            'url': 'http://new.com/products',
-            'similarity': 0.70
-        }]
-
-        # Execute
-        result = await stage.execute((old_pages, new_pages, mappings))
-
-        # Verify mapping always needs review
-        call_kwargs = mock_insert.call_args[1]
-        self.assertEqual(call_kwargs['confidence_score'], 0.70)
-        self.assertEqual(call_kwargs['match_type'], 'semantic_low')
-        self.assertTrue(call_kwargs['needs_review'])
+        for case, similarities, match_type, needs_review in cases:
+            with self.subTest(case=case):
+                mock_insert.reset_mock()
+                query, embeddings = embeddings_with_similarities(*similarities)
+                serve_embeddings(
+                    mock_get_embeddings,
+                    old=[{'url': 'http://old.com/page1', 'embedding': query}],
+                    new=[
+                        {'url': url, 'embedding': embedding}
+                        for url, embedding in zip(new_urls, embeddings)
+                    ]
+                )
+
+                result = await stage.execute((
+                    [self.old_page_1],
+                    [self.new_page_1, self.new_page_2][:len(similarities)],
+                    set()
+                ))
+
+                # Mapping goes to the best candidate with the tier's attributes
+                mock_insert.assert_called_once()
+                call_kwargs = mock_insert.call_args[1]
+                self.assertEqual(call_kwargs['new_url'], 'http://new.com/products')
+                self.assertAlmostEqual(call_kwargs['confidence_score'], similarities[0], places=6)
+                self.assertEqual(call_kwargs['match_type'], match_type)
+                self.assertEqual(call_kwargs['needs_review'], needs_review)
+                self.assertEqual(len(result[2]), 1)
 
     @patch('src.redirx.stages.URLMappingDB.insert_mapping')
-    @patch('src.redirx.stages.WebPageEmbeddingDB.find_similar_pages')
     @patch('src.redirx.stages.WebPageEmbeddingDB.get_embeddings_by_session')
-    async def test_orphaned_page_below_threshold(self, mock_get_embeddings, mock_find_similar, mock_insert):
+    async def test_orphaned_page_below_threshold(self, mock_get_embeddings, mock_insert):
         """Test that pages below 0.6 threshold are orphaned (no match created)."""
-        stage = PairingStage(session_id=self.session_id)
+        stage = self.stage
 
         old_pages = [self.old_page_orphaned]
         new_pages = [self.new_page_1]
         mappings = set()
 
-        # Mock embeddings
-        mock_get_embeddings.return_value = [{
-            'url': 'http://old.com/orphaned',
-            'embedding': [0.1] * 1536
-        }]
-
-        # Mock very low similarity (below threshold)
-        mock_find_similar.return_value = [{
-            'url': 'http://new.com/products',
-            'similarity': 0.45  # Below 0.6 threshold
-        }]
+        # Mock very low similarity (below 0.6 threshold)
+        query, (products,) = embeddings_with_similarities(0.45)
+        serve_embeddings(
+            mock_get_embeddings,
+            old=[{'url': 'http://old.com/orphaned', 'embedding': query}],
+            new=[{'url': 'http://new.com/products', 'embedding': products}]
+        )
 
         # Execute
         result = await stage.execute((old_pages, new_pages, mappings))
@@ -263,24 +216,21 @@ class TestPairingStage(unittest.TestCase):
         self.assertEqual(len(result[2]), 0)
 
     @patch('src.redirx.stages.URLMappingDB.insert_mapping')
-    @patch('src.redirx.stages.WebPageEmbeddingDB.find_similar_pages')
     @patch('src.redirx.stages.WebPageEmbeddingDB.get_embeddings_by_session')
-    async def test_orphaned_page_no_similar_pages(self, mock_get_embeddings, mock_find_similar, mock_insert):
+    async def test_orphaned_page_no_similar_pages(self, mock_get_embeddings, mock_insert):
         """Test that pages with no similar results are orphaned."""
-        stage = PairingStage(session_id=self.session_id)
+        stage = self.stage
 
         old_pages = [self.old_page_orphaned]
         new_pages = [self.new_page_1]
         mappings = set()
 
-        # Mock embeddings
-        mock_get_embeddings.return_value = [{
-            'url': 'http://old.com/orphaned',
-            'embedding': [0.1] * 1536
-        }]
-
-        # Mock no similar pages found
-        mock_find_similar.return_value = []
+        # Mock no new-site embeddings to compare against
+        serve_embeddings(
+            mock_get_embeddings,
+            old=[{'url': 'http://old.com/orphaned', 'embedding': [0.1] * 1536}],
+            new=[]
+        )
 
         # Execute
         result = await stage.execute((old_pages, new_pages, mappings))
@@ -290,11 +240,10 @@ class TestPairingStage(unittest.TestCase):
         self.assertEqual(len(result[2]), 0)
 
     @patch('src.redirx.stages.URLMappingDB.insert_mapping')
-    @patch('src.redirx.stages.WebPageEmbeddingDB.find_similar_pages')
     @patch('src.redirx.stages.WebPageEmbeddingDB.get_embeddings_by_session')
-    async def test_avoids_rematching_already_matched_pages(self, mock_get_embeddings, mock_find_similar, mock_insert):
+    async def test_avoids_rematching_already_matched_pages(self, mock_get_embeddings, mock_insert):
         """Test that already matched pages are excluded from new matches."""
-        stage = PairingStage(session_id=self.session_id)
+        stage = self.stage
 
         # Create existing mapping
         existing_mapping = Mapping(
@@ -309,17 +258,16 @@ class TestPairingStage(unittest.TestCase):
         new_pages = [self.new_page_1, self.new_page_2]
         mappings = {existing_mapping}
 
-        # Mock embeddings
-        mock_get_embeddings.return_value = [{
-            'url': 'http://old.com/page2',
-            'embedding': [0.2] * 1536
-        }]
-
-        # Mock that find_similar returns the already matched page first
-        mock_find_similar.return_value = [
-            {'url': 'http://new.com/products', 'similarity': 0.90},  # Already matched!
-            {'url': 'http://new.com/services', 'similarity': 0.85}
-        ]
+        # The already matched page is the most similar candidate
+        query, (products, services) = embeddings_with_similarities(0.90, 0.85)
+        serve_embeddings(
+            mock_get_embeddings,
+            old=[{'url': 'http://old.com/page2', 'embedding': query}],
+            new=[
+                {'url': 'http://new.com/products', 'embedding': products},  # Already matched!
+                {'url': 'http://new.com/services', 'embedding': services}
+            ]
+        )
 
         # Execute
         result = await stage.execute((old_pages, new_pages, mappings))
@@ -339,169 +287,167 @@ class TestPairingStage(unittest.TestCase):
     @patch('src.redirx.stages.WebPageEmbeddingDB.get_embeddings_by_session')
     async def test_integration_with_multiple_pages(self, mock_get_embeddings, mock_insert):
         """Integration test with multiple pages, matches, and orphans."""
-        stage = PairingStage(session_id=self.session_id)
+        stage = self.stage
 
         old_pages = [self.old_page_1, self.old_page_2, self.old_page_orphaned]
         new_pages = [self.new_page_1, self.new_page_2, self.new_page_new]
         mappings = set()
 
-        # Mock embeddings for all old pages
-        mock_get_embeddings.return_value = [
-            {'url': 'http://old.com/page1', 'embedding': [0.1] * 1536},
-            {'url': 'http://old.com/page2', 'embedding': [0.2] * 1536},
-            {'url': 'http://old.com/orphaned', 'embedding': [0.3] * 1536}
-        ]
+        # Each old page is similar only to its own new counterpart:
+        # page1 -> products (high), page2 -> services (medium),
+        # orphaned -> blog (below threshold)
+        query_1, (products,) = embeddings_with_similarities(0.92, offset=0)
+        query_2, (services,) = embeddings_with_similarities(0.83, offset=10)
+        query_3, (blog,) = embeddings_with_similarities(0.40, offset=20)
+        serve_embeddings(
+            mock_get_embeddings,
+            old=[
+                {'url': 'http://old.com/page1', 'embedding': query_1},
+                {'url': 'http://old.com/page2', 'embedding': query_2},
+                {'url': 'http://old.com/orphaned', 'embedding': query_3}
+            ],
+            new=[
+                {'url': 'http://new.com/products', 'embedding': products},
+                {'url': 'http://new.com/services', 'embedding': services},
+                {'url': 'http://new.com/blog', 'embedding': blog}
+            ]
+        )
 
-        # Mock find_similar to return different results for each page
-        def mock_find_similar_side_effect(query_embedding, session_id, site_type, match_count, match_threshold):
-            # Determine which old page this is based on embedding
-            if np.allclose(query_embedding, [0.1] * 1536):
-                # old_page_1 -> new_page_1 (high confidence)
-                return [{'url': 'http://new.com/products', 'similarity': 0.92}]
-            elif np.allclose(query_embedding, [0.2] * 1536):
-                # old_page_2 -> new_page_2 (medium confidence)
-                return [{'url': 'http://new.com/services', 'similarity': 0.83}]
-            else:
-                # old_page_orphaned -> no match
-                return [{'url': 'http://new.com/blog', 'similarity': 0.40}]
-
-        with patch('src.redirx.stages.WebPageEmbeddingDB.find_similar_pages', side_effect=mock_find_similar_side_effect):
-            # Execute
-            result = await stage.execute((old_pages, new_pages, mappings))
+        # Execute
+        result = await stage.execute((old_pages, new_pages, mappings))
 
         # Verify we have 2 mappings (page1 and page2, orphaned excluded)
         self.assertEqual(len(result[2]), 2)
 
-        # Verify insert was called twice
+        # Verify insert was called twice, for the expected pairs
         self.assertEqual(mock_insert.call_count, 2)
+        pairs = {(c[1]['old_url'], c[1]['new_url']) for c in mock_insert.call_args_list}
+        self.assertEqual(pairs, {
+            ('http://old.com/page1', 'http://new.com/products'),
+            ('http://old.com/page2', 'http://new.com/services')
+        })
+
+        # Both sites' embeddings are loaded once, not once per old page,
+        # and without the extracted text
+        self.assertEqual(mock_get_embeddings.call_count, 2)
+        for c in mock_get_embeddings.call_args_list:
+            self.assertEqual(c[1]['columns'], 'url, embedding')
+
+    def test_top_k(self):
+        """Test _top_k returns each row's best columns, best first."""
+        scores = np.array([
+            [0.1, 0.9, 0.5, 0.7],
+            [0.8, 0.2, 0.3, 0.4],
+        ])
+
+        np.testing.assert_array_equal(PairingStage._top_k(scores, 2), [[1, 3], [0, 3]])
+        # k larger than the number of columns returns every column
+        self.assertEqual(PairingStage._top_k(scores, 10).shape, (2, 4))
+        self.assertEqual(PairingStage._top_k(np.empty((2, 0)), 5).shape, (2, 0))
+
+    def test_top_matches_blocks_match_full_matmul(self):
+        """Test _top_matches gives the same candidates in blocks as in one matmul."""
+        rng = np.random.default_rng(0)
+        old_matrix = rng.standard_normal((7, 16)).astype(np.float32)
+        new_matrix = rng.standard_normal((9, 16)).astype(np.float32)
+
+        full = old_matrix @ new_matrix.T
+        expected = PairingStage._top_k(full, 3)
+
+        with patch.object(PairingStage, 'SCORE_BLOCK_ROWS', 2):
+            columns, scores = PairingStage._top_matches(old_matrix, new_matrix, 3)
+
+        np.testing.assert_array_equal(columns, expected)
+        np.testing.assert_allclose(scores, np.take_along_axis(full, expected, axis=1), rtol=1e-6)
 
     def test_find_best_match(self):
         """Test _find_best_match helper method."""
-        stage = PairingStage(session_id=self.session_id)
+        stage = self.stage
 
         # Test with valid matches
-        similar_pages = [
-            {'url': 'http://new.com/page1', 'similarity': 0.85},
-            {'url': 'http://new.com/page2', 'similarity': 0.75},
-            {'url': 'http://new.com/page3', 'similarity': 0.65}
-        ]
+        similar_pages = candidates(
+            ('http://new.com/page1', 0.85),
+            ('http://new.com/page2', 0.75),
+            ('http://new.com/page3', 0.65)
+        )
 
         best = stage._find_best_match(similar_pages)
         self.assertEqual(best['url'], 'http://new.com/page1')
         self.assertEqual(best['similarity'], 0.85)
 
         # Test with all below threshold
-        low_similar_pages = [
-            {'url': 'http://new.com/page1', 'similarity': 0.55},
-            {'url': 'http://new.com/page2', 'similarity': 0.45}
-        ]
+        low_similar_pages = candidates(
+            ('http://new.com/page1', 0.55),
+            ('http://new.com/page2', 0.45)
+        )
 
         best = stage._find_best_match(low_similar_pages)
         self.assertIsNone(best)
 
-        # Test with empty list
-        best = stage._find_best_match([])
+        # Test with no candidates
+        best = stage._find_best_match(candidates())
         self.assertIsNone(best)
 
-    def test_create_mapping_high_confidence(self):
-        """Test _create_mapping for high confidence (>=0.9)."""
-        stage = PairingStage(session_id=self.session_id)
-
-        similar_pages = [{'url': 'http://new.com/products', 'similarity': 0.95}]
-
-        mapping = stage._create_mapping(
-            old_page=self.old_page_1,
-            new_page=self.new_page_1,
-            similarity_score=0.95,
-            similar_pages=similar_pages
-        )
-
-        self.assertEqual(mapping.confidence_score, 0.95)
-        self.assertEqual(mapping.match_type, 'semantic_high')
-        self.assertFalse(mapping.needs_review)
-
-    def test_create_mapping_medium_confidence_clear(self):
-        """Test _create_mapping for medium confidence without ambiguity."""
-        stage = PairingStage(session_id=self.session_id)
-
-        similar_pages = [
-            {'url': 'http://new.com/products', 'similarity': 0.85},
-            {'url': 'http://new.com/other', 'similarity': 0.70}  # Gap > 0.1
-        ]
-
-        mapping = stage._create_mapping(
-            old_page=self.old_page_1,
-            new_page=self.new_page_1,
-            similarity_score=0.85,
-            similar_pages=similar_pages
-        )
-
-        self.assertEqual(mapping.match_type, 'semantic_medium')
-        self.assertFalse(mapping.needs_review)  # Clear winner
-
-    def test_create_mapping_medium_confidence_ambiguous(self):
-        """Test _create_mapping for medium confidence with ambiguity."""
-        stage = PairingStage(session_id=self.session_id)
-
-        similar_pages = [
-            {'url': 'http://new.com/products', 'similarity': 0.85},
-            {'url': 'http://new.com/other', 'similarity': 0.82}  # Gap < 0.1
+    def test_create_mapping_confidence_tiers(self):
+        """Test _create_mapping's match type and review flag for each tier."""
+        stage = self.stage
+
+        # (case, candidates, expected match_type, expected needs_review)
+        cases = [
+            ('high', candidates(('http://new.com/products', 0.95)), 'semantic_high', False),
+            ('medium-clear', candidates(
+                ('http://new.com/products', 0.85),
+                ('http://new.com/other', 0.70)  # Gap > 0.1
+            ), 'semantic_medium', False),
+            ('medium-ambiguous', candidates(
+                ('http://new.com/products', 0.85),
+                ('http://new.com/other', 0.82)  # Gap < 0.1
+            ), 'semantic_medium', True),
+            ('low', candidates(('http://new.com/products', 0.70)), 'semantic_low', True),
         ]
 
-        mapping = stage._create_mapping(
-            old_page=self.old_page_1,
-            new_page=self.new_page_1,
-            similarity_score=0.85,
-            similar_pages=similar_pages
-        )
-
-        self.assertEqual(mapping.match_type, 'semantic_medium')
-        self.assertTrue(mapping.needs_review)  # Ambiguous
-
-    def test_create_mapping_low_confidence(self):
-        """Test _create_mapping for low confidence (0.6-0.8)."""
-        stage = PairingStage(session_id=self.session_id)
+        for case, similar_pages, match_type, needs_review in cases:
+            with self.subTest(case=case):
+                score = float(similar_pages['scores'][0])
+                mapping = stage._create_mapping(
+                    old_page=self.old_page_1,
+                    new_page=self.new_page_1,
+                    similarity_score=score,
+                    similar_pages=similar_pages
+                )
 
-        similar_pages = [{'url': 'http://new.com/products', 'similarity': 0.70}]
-
-        mapping = stage._create_mapping(
-            old_page=self.old_page_1,
-            new_page=self.new_page_1,
-            similarity_score=0.70,
-            similar_pages=similar_pages
-        )
-
-        self.assertEqual(mapping.match_type, 'semantic_low')
-        self.assertTrue(mapping.needs_review)
+                self.assertEqual(mapping.confidence_score, score)
+                self.assertEqual(mapping.match_type, match_type)
+                self.assertEqual(mapping.needs_review, needs_review)
 
     def test_is_ambiguous(self):
         """Test _is_ambiguous helper method."""
-        stage = PairingStage(session_id=self.session_id)
+        stage = self.stage
 
         # Test ambiguous case (gap < 0.1)
-        similar_pages = [
-            {'url': 'http://new.com/page1', 'similarity': 0.85},
-            {'url': 'http://new.com/page2', 'similarity': 0.82}
-        ]
+        similar_pages = candidates(
+            ('http://new.com/page1', 0.85),
+            ('http://new.com/page2', 0.82)
+        )
         self.assertTrue(stage._is_ambiguous(0.85, similar_pages))
 
         # Test clear case (gap >= 0.1)
-        similar_pages = [
-            {'url': 'http://new.com/page1', 'similarity': 0.85},
-            {'url': 'http://new.com/page2', 'similarity': 0.70}
-        ]
+        similar_pages = candidates(
+            ('http://new.com/page1', 0.85),
+            ('http://new.com/page2', 0.70)
+        )
         self.assertFalse(stage._is_ambiguous(0.85, similar_pages))
 
         # Test with only one page
-        similar_pages = [{'url': 'http://new.com/page1', 'similarity': 0.85}]
+        similar_pages = candidates(('http://new.com/page1', 0.85))
         self.assertFalse(stage._is_ambiguous(0.85, similar_pages))
 
-        # Test with empty list
-        self.assertFalse(stage._is_ambiguous(0.85, []))
+        # Test with no candidates
+        self.assertFalse(stage._is_ambiguous(0.85, candidates()))
 
     async def test_execute_returns_input_unchanged(self):
         """Test that execute returns the same tuple structure (pass-through)."""
-        stage = PairingStage(session_id=self.session_id)
+        stage = self.stage
 
         old_pages = [self.old_page_1]
         new_pages = [self.new_page_1]
@@ -519,20 +465,5 @@ class TestPairingStage(unittest.TestCase):
         self.assertIsInstance(result[2], set)
 
 
-# Helper to run async tests
-def async_test(coro):
-    """Decorator to run async test methods."""
-    def wrapper(*args, **kwargs):
-        return asyncio.run(coro(*args, **kwargs))
-    return wrapper
-
-
-# Apply async_test decorator to all async test methods
-for attr_name in dir(TestPairingStage):
-    attr = getattr(TestPairingStage, attr_name)
-    if asyncio.iscoroutinefunction(attr) and attr_name.startswith('test_'):
-        setattr(TestPairingStage, attr_name, async_test(attr))
-
-
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,8 @@
 import unittest
 import os
 import sys
+from unittest.mock import patch
+from uuid import uuid4
 
 # Add project root to Python path
 parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
@@ -131,6 +133,14 @@ class TestTextExtraction(unittest.TestCase):
         # Should be truncated to ~32k chars
         self.assertLessEqual(len(text), 32000)
 
+    def test_extract_text_truncates_at_word_boundaries_across_elements(self):
+        """Test that truncation keeps the first 32k chars of the normalized text."""
+        words = [f'word{i}' for i in range(10000)]
+        html = '<html><body>' + ''.join(f'<p>\n  {w}  </p>' for w in words) + '</body></html>'
+        page = WebPage('http://test.com', html)
+
+        self.assertEqual(page.extract_text(), ' '.join(words)[:32000])
+
     def test_extract_text_fallback_to_url(self):
         """Test that URL is used as fallback for empty content."""
         html = '<html><body><script>only script</script></body></html>'
@@ -217,6 +227,67 @@ class TestTextExtraction(unittest.TestCase):
         title = page.extract_title()
         self.assertEqual(title, '')
 
+    def test_extract_text_keeps_text_around_removed_elements_separate(self):
+        """Test that text on either side of a removed element isn't joined together."""
+        html = '<html><body><p>before<script>var x = 1;</script>after the script</p></body></html>'
+        page = WebPage('http://test.com', html)
+
+        self.assertEqual(page.extract_text(), 'before after the script')
+
+    def test_extract_title_from_h1_inside_header(self):
+        """Test that the h1 fallback still sees headings in removed boilerplate."""
+        html = '''
+        <html>
+            <body>
+                <header><h1>Site <em>Heading</em></h1></header>
+                <main><p>Main content of the page</p></main>
+            </body>
+        </html>
+        '''
+        page = WebPage('http://test.com', html)
+
+        # Extracting text first must not discard the header the title comes from
+        self.assertEqual(page.extract_text(), 'Main content of the page')
+        self.assertEqual(page.extract_title(), 'SiteHeading')
+
+    def test_extract_from_xhtml_with_xml_declaration(self):
+        """Test that XHTML pages starting with an XML prolog are parsed."""
+        html = '''<?xml version="1.0" encoding="UTF-8"?>
+        <!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Strict//EN"
+            "http://www.w3.org/TR/xhtml1/DTD/xhtml1-strict.dtd">
+        <html xmlns="http://www.w3.org/1999/xhtml">
+            <head><title>Legacy Page</title></head>
+            <body><p>Content from an old XHTML site</p></body>
+        </html>
+        '''
+        page = WebPage('http://test.com/legacy.xhtml', html)
+
+        self.assertEqual(page.extract_text(), 'Content from an old XHTML site')
+        self.assertEqual(page.extract_title(), 'Legacy Page')
+
+
+    def test_identical_html_is_parsed_once(self):
+        """Test that pages with identical HTML share one parse."""
+        # Unique content so earlier tests can't have cached this HTML
+        html = f'<html><head><title>Shared</title></head><body><p>Body {uuid4()}</p></body></html>'
+        old_page = WebPage('http://old.com/page', html)
+        new_page = WebPage('http://new.com/page', html)
+
+        with patch.object(WebPage, '_parse_html', wraps=WebPage._parse_html) as mock_parse:
+            self.assertEqual(old_page.extract_text(), new_page.extract_text())
+            self.assertEqual(new_page.extract_title(), 'Shared')
+
+        mock_parse.assert_called_once()
+
+    def test_shared_parse_keeps_per_page_url_fallback(self):
+        """Test that the URL fallback uses each page's own URL when HTML is shared."""
+        html = f'<html><body><script>{uuid4()}</script></body></html>'
+        old_page = WebPage('http://old.com/a', html)
+        new_page = WebPage('http://new.com/b', html)
+
+        self.assertEqual(old_page.extract_text(), 'http://old.com/a')
+        self.assertEqual(new_page.extract_text(), 'http://new.com/b')
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -8,6 +8,7 @@ import unittest
 import asyncio
 import os
 import sys
+from unittest.mock import patch
 
 # Add project root to Python path
 parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
@@ -16,7 +17,7 @@ sys.path.insert(0, parent_dir)
 from src.redirx.stages import UrlPruneStage
 
 
-class TestUrlPruneStage(unittest.TestCase):
+class TestUrlPruneStage(unittest.IsolatedAsyncioTestCase):
     """Tests for UrlPruneStage filtering logic."""
 
     def setUp(self):
@@ -108,6 +109,12 @@ class TestUrlPruneStage(unittest.TestCase):
         self.assertFalse(UrlPruneStage._sanitizer('http://example.com/style.css?v=2'))
         self.assertFalse(UrlPruneStage._sanitizer('http://example.com/app.js?v=1.2'))
 
+    def test_sanitizer_ignores_dots_outside_last_segment(self):
+        """Test that only the final path segment's extension is considered."""
+        self.assertTrue(UrlPruneStage._sanitizer('http://example.com/page?file=style.css'))
+        self.assertTrue(UrlPruneStage._sanitizer('http://example.com/v1.css/about'))
+        self.assertFalse(UrlPruneStage._sanitizer('http://example.com/v1.2/app.js'))
+
     def test_sanitizer_handles_fragments(self):
         """Test handling of URLs with fragments."""
         self.assertTrue(UrlPruneStage._sanitizer('http://example.com/page.html#section'))
@@ -135,6 +142,30 @@ class TestUrlPruneStage(unittest.TestCase):
         self.assertTrue(UrlPruneStage._sanitizer('http://example.com/v1.0/about'))
         self.assertTrue(UrlPruneStage._sanitizer('http://example.com/api.v2/docs'))
 
+    def test_sanitizer_ignores_host_names(self):
+        """Test that only the path, not the host, decides the extension."""
+        self.assertTrue(UrlPruneStage._sanitizer('http://assets.js'))
+        self.assertTrue(UrlPruneStage._sanitizer('https://cdn.example.css/'))
+        self.assertTrue(UrlPruneStage._sanitizer('//static.example.png'))
+        self.assertFalse(UrlPruneStage._sanitizer('//static.example.com/logo.png'))
+        self.assertFalse(UrlPruneStage._sanitizer('/assets//styles.css'))
+
+    def test_sanitizer_caches_repeated_urls(self):
+        """Test that a repeated URL is answered from the sanitizer's cache."""
+        url = 'http://example.com/assets/repeated-sanitizer-check.css'
+
+        self.assertFalse(UrlPruneStage._sanitizer(url))
+        hits = UrlPruneStage._sanitizer.cache_info().hits
+        self.assertFalse(UrlPruneStage._sanitizer(url))
+
+        self.assertEqual(UrlPruneStage._sanitizer.cache_info().hits, hits + 1)
+
+    def test_sanitizer_ignores_leading_dots(self):
+        """Test that a dot-file name alone isn't treated as an extension."""
+        self.assertTrue(UrlPruneStage._sanitizer('http://example.com/.css'))
+        self.assertTrue(UrlPruneStage._sanitizer('http://example.com/..js'))
+        self.assertFalse(UrlPruneStage._sanitizer('http://example.com/.theme.css'))
+
     def test_sanitizer_handles_malformed_urls(self):
         """Test that malformed URLs are handled gracefully (permissive)."""
         # Should not crash, should be permissive
@@ -276,23 +307,33 @@ class TestUrlPruneStage(unittest.TestCase):
         self.assertNotIn('http://localhost:8000/assets/styles.css', result_old)
         self.assertNotIn('http://localhost:8001/assets/app.js', result_new)
 
+    async def test_execute_drops_duplicate_urls(self):
+        """Test that repeated URLs are kept once, in first-seen order."""
+        old_urls = [
+            'http://old.com/about',
+            'http://old.com/styles.css',
+            'http://old.com/',
+            'http://old.com/about',
+            'http://old.com/styles.css',
+        ]
 
-# ============================================================================
-# Test Runner Helper
-# ============================================================================
+        result_old, result_new = await self.stage.execute((old_urls, []))
+
+        self.assertEqual(result_old, ['http://old.com/about', 'http://old.com/'])
+        self.assertEqual(result_new, [])
 
-def async_test(coro):
-    """Decorator to run async test methods."""
-    def wrapper(*args, **kwargs):
-        return asyncio.run(coro(*args, **kwargs))
-    return wrapper
+    async def test_execute_offloads_large_inputs_to_threads(self):
+        """Test that large inputs are filtered off the event loop with the same result."""
+        old_urls = [f'http://old.com/page{i}.html' for i in range(5)] + ['http://old.com/app.js']
+        new_urls = ['http://new.com/styles.css'] + [f'http://new.com/page{i}' for i in range(5)]
 
+        with patch.object(UrlPruneStage, 'THREAD_OFFLOAD_MIN_URLS', 1), \
+             patch('src.redirx.stages.asyncio.to_thread', wraps=asyncio.to_thread) as mock_to_thread:
+            result_old, result_new = await self.stage.execute((old_urls, new_urls))
 
-# Apply async_test decorator to all async test methods
-for attr_name in dir(TestUrlPruneStage):
-    attr = getattr(TestUrlPruneStage, attr_name)
-    if asyncio.iscoroutinefunction(attr) and attr_name.startswith('test_'):
-        setattr(TestUrlPruneStage, attr_name, async_test(attr))
+        self.assertEqual(mock_to_thread.call_count, 2)
+        self.assertEqual(result_old, old_urls[:5])
+        self.assertEqual(result_new, new_urls[1:])
 
 
 if __name__ == '__main__':
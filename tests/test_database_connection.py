@@ -1,6 +1,7 @@
 import unittest
 import os
 import sys
+from unittest.mock import MagicMock, patch
 
 # Add parent directory to path for imports
 parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -35,13 +36,18 @@ class TestDatabaseConnection(unittest.TestCase):
         except ValueError as e:
             raise unittest.SkipTest(f"Configuration error: {e}")
 
+        # One set of DB wrappers for the whole suite, all on the shared client
+        cls.session_db = MigrationSessionDB()
+        cls.embedding_db = WebPageEmbeddingDB()
+        cls.mapping_db = URLMappingDB()
+
+        # Seeded float32 vectors for the similarity search test, drawn in one call
+        cls.vectors = np.random.default_rng(42).standard_normal((3, 1536), dtype=np.float32)
+
     def setUp(self):
         """
         Set up test fixtures for each test.
         """
-        self.session_db = MigrationSessionDB()
-        self.embedding_db = WebPageEmbeddingDB()
-        self.mapping_db = URLMappingDB()
         self.test_session_id = None
 
     def tearDown(self):
@@ -51,22 +57,8 @@ class TestDatabaseConnection(unittest.TestCase):
         # Clean up test session and related data if created
         if self.test_session_id:
             try:
-                client = SupabaseClient.get_client()
-
-                # Delete embeddings
-                client.table('webpage_embeddings').delete().eq(
-                    'session_id', str(self.test_session_id)
-                ).execute()
-
-                # Delete mappings
-                client.table('url_mappings').delete().eq(
-                    'session_id', str(self.test_session_id)
-                ).execute()
-
-                # Delete session
-                client.table('migration_sessions').delete().eq(
-                    'id', str(self.test_session_id)
-                ).execute()
+                # One DELETE; embeddings and mappings cascade server-side
+                self.session_db.delete_session(self.test_session_id)
 
             except Exception as e:
                 print(f"\nWarning: Cleanup failed: {e}")
@@ -145,6 +137,55 @@ class TestDatabaseConnection(unittest.TestCase):
         self.assertEqual(embeddings[0]['url'], 'https://old-site.com/test')
         print(f"✓ Retrieved {len(embeddings)} embedding(s)")
 
+    def test_04b_insert_embeddings_bulk(self):
+        """
+        Test inserting several webpage embeddings in one request.
+        """
+        session_id = self.session_db.create_session(user_id='test_user')
+        self.test_session_id = session_id
+
+        records = [
+            {
+                'url': f'https://new-site.com/page{i}',
+                'embedding': np.random.randn(1536),
+                'extracted_text': f'Page {i} content',
+                'title': f'Page {i}'
+            }
+            for i in range(3)
+        ]
+
+        embedding_ids = self.embedding_db.insert_embeddings(session_id, 'new', records)
+
+        self.assertEqual(len(embedding_ids), 3)
+        print(f"\n✓ Inserted {len(embedding_ids)} embeddings in one request")
+
+        embeddings = self.embedding_db.get_embeddings_by_session(session_id, 'new')
+        self.assertEqual(
+            sorted(e['url'] for e in embeddings),
+            [record['url'] for record in records]
+        )
+
+    def test_04c_get_embeddings_pages_through_results(self):
+        """
+        Test that reads return every row when they span several pages.
+        """
+        session_id = self.session_db.create_session(user_id='test_user')
+        self.test_session_id = session_id
+
+        urls = [f'https://new-site.com/page{i}' for i in range(5)]
+        self.embedding_db.insert_embeddings(session_id, 'new', [
+            {'url': url, 'embedding': np.random.randn(1536), 'extracted_text': url}
+            for url in urls
+        ])
+
+        with patch.object(WebPageEmbeddingDB, 'PAGE_SIZE', 2):
+            embeddings = self.embedding_db.get_embeddings_by_session(
+                session_id, 'new', columns='url'
+            )
+
+        self.assertEqual(sorted(e['url'] for e in embeddings), urls)
+        print(f"\n✓ Retrieved {len(embeddings)} embeddings across pages of 2")
+
     def test_05_vector_similarity_search(self):
         """
         Test vector similarity search functionality.
@@ -153,11 +194,8 @@ class TestDatabaseConnection(unittest.TestCase):
         session_id = self.session_db.create_session(user_id='test_user')
         self.test_session_id = session_id
 
-        # Insert multiple embeddings
-        np.random.seed(42)  # For reproducibility
-
         # Insert "old" page
-        old_embedding = np.random.randn(1536)
+        old_embedding = self.vectors[0]
         self.embedding_db.insert_embedding(
             session_id=session_id,
             url='https://old-site.com/about',
@@ -167,27 +205,24 @@ class TestDatabaseConnection(unittest.TestCase):
             title='About Us'
         )
 
-        # Insert similar "new" page (add small noise to old embedding)
-        similar_embedding = old_embedding + np.random.randn(1536) * 0.1
-        self.embedding_db.insert_embedding(
-            session_id=session_id,
-            url='https://new-site.com/about-us',
-            site_type='new',
-            embedding=similar_embedding,
-            extracted_text='About our company',
-            title='About Us - New Site'
-        )
-
-        # Insert dissimilar "new" page
-        dissimilar_embedding = np.random.randn(1536)
-        self.embedding_db.insert_embedding(
-            session_id=session_id,
-            url='https://new-site.com/products',
-            site_type='new',
-            embedding=dissimilar_embedding,
-            extracted_text='Our products',
-            title='Products'
-        )
+        # Insert both "new" pages in one request: one similar (small noise
+        # added to the old embedding) and one dissimilar
+        similar_embedding = old_embedding + self.vectors[1] * 0.1
+        dissimilar_embedding = self.vectors[2]
+        self.embedding_db.insert_embeddings(session_id, 'new', [
+            {
+                'url': 'https://new-site.com/about-us',
+                'embedding': similar_embedding,
+                'extracted_text': 'About our company',
+                'title': 'About Us - New Site'
+            },
+            {
+                'url': 'https://new-site.com/products',
+                'embedding': dissimilar_embedding,
+                'extracted_text': 'Our products',
+                'title': 'Products'
+            }
+        ])
 
         # Search for similar pages
         results = self.embedding_db.find_similar_pages(
@@ -277,6 +312,37 @@ class TestDatabaseConnection(unittest.TestCase):
         print(f"✓ Mappings needing review: {len(review_mappings)}")
 
 
+class TestEmbeddingCacheLookup(unittest.TestCase):
+    """
+    Request shape of embedding cache lookups, against a mocked client.
+    """
+
+    def test_get_by_content_hash_splits_large_lookups(self):
+        """
+        Test that a 400-hash lookup is sent as several bounded requests.
+        """
+        client = MagicMock()
+        query = client.table.return_value.select.return_value.eq.return_value
+        query.in_.side_effect = lambda column, hashes: MagicMock(**{
+            'execute.return_value.data': [
+                {'content_hash': h, 'embedding': '[0.5, 0.25]'} for h in hashes[:1]
+            ]
+        })
+        embedding_db = WebPageEmbeddingDB(client=client)
+        hashes = [f'{i:032x}' for i in range(400)]
+
+        cached = embedding_db.get_by_content_hash(hashes, 'text-embedding-3-small')
+
+        chunks = [call[0][1] for call in query.in_.call_args_list]
+        self.assertEqual(len(chunks), 4)
+        self.assertTrue(all(len(chunk) <= WebPageEmbeddingDB.CACHE_LOOKUP_CHUNK for chunk in chunks))
+        self.assertEqual([h for chunk in chunks for h in chunk], hashes)
+
+        # Hits from every chunk are merged
+        self.assertEqual(sorted(cached), [hashes[0], hashes[100], hashes[200], hashes[300]])
+        np.testing.assert_array_equal(cached[hashes[0]], np.array([0.5, 0.25], dtype=np.float32))
+
+
 if __name__ == '__main__':
     print("\n" + "="*60)
     print("Redirx Database Connection Test Suite")